@@ -0,0 +1,73 @@
+"""Async counterparts of the crud read functions.
+
+Used by the async read endpoints, so a request waiting on a database round
+trip (Neon is a network hop away) doesn't hold a threadpool worker. They run
+the same select() statements as their crud twins through an AsyncSession.
+
+Writes stay synchronous in crud: they are rare, and their tally / snapshot
+bookkeeping is easier to keep in one place. Heavier sync readers (app/stats.py)
+are run on the async session with `AsyncSession.run_sync`.
+"""
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, stats
+
+
+async def get_players(db: AsyncSession, cursor: Optional[str] = None, limit: Optional[int] = None,
+                      season: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """See crud.get_players."""
+    stmt = crud.players_statement(cursor, limit, season, date_from, date_to)
+    return crud.keyset_page((await db.scalars(stmt)).all(), crud.PLAYER_ORDER, limit)
+
+
+async def get_matches(db: AsyncSession, cursor: Optional[str] = None, limit: Optional[int] = None,
+                      season: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      player_id: Optional[int] = None):
+    """See crud.get_matches."""
+    stmt = crud.matches_statement(cursor, limit, season, date_from, date_to, player_id)
+    return crud.keyset_page((await db.scalars(stmt)).all(), crud.MATCH_ORDER, limit)
+
+
+async def get_player_visibility(db: AsyncSession):
+    """See crud.get_player_visibility."""
+    return (await db.scalars(select(models.PlayerVisibility))).all()
+
+
+async def get_resolved_visibility(db: AsyncSession, season_start_year: int):
+    """See crud.get_resolved_visibility."""
+    rows = await db.execute(crud.resolved_visibility_statement(season_start_year))
+    return crud.resolve_visibility(season_start_year, rows)
+
+
+async def get_bootstrap(db: AsyncSession, season: Optional[int] = None):
+    """Players, matches, visibility overrides and unknown-player goals in one
+    read-only transaction, so they all show the same database state.
+
+    On Postgres the transaction is REPEATABLE READ: every query sees the
+    snapshot taken by the first one, even if an admin commits in between.
+    The SQLite driver doesn't open a transaction for SELECTs on its own, so
+    the queries would each read the then-current state; an explicit BEGIN
+    makes them share one read transaction (writers wait for it to end).
+    `season` filters the matches and the players' embedded goals.
+    """
+    if db.bind.dialect.name == "postgresql":
+        await db.connection(execution_options={"isolation_level": "REPEATABLE READ", "postgresql_readonly": True})
+    elif db.bind.dialect.name == "sqlite":
+        await (await db.connection()).exec_driver_sql("BEGIN")
+    players, _ = await get_players(db, season=season)
+    matches, _ = await get_matches(db, season=season)
+    return {
+        "players": players,
+        "matches": matches,
+        "visibility": await get_player_visibility(db),
+        "unknown_player_goals": (await db.scalars(crud.unknown_player_goals_statement())).unique().all(),
+    }
+
+
+async def get_seasons(db: AsyncSession):
+    """See stats.get_seasons."""
+    return list(await db.scalars(stats.SEASONS_STATEMENT))
@@ -0,0 +1,432 @@
+"""Backup jobs and the on-disk backup store.
+
+Jobs: on a cold serverless Postgres an export can outlast client and proxy
+timeouts, so POST /backup/jobs only enqueues it. One worker thread runs the
+exports; the client polls the job for progress (tables and rows copied) and
+downloads the file once it is done. Asking for a backup while one of the same
+kind is already queued or running returns that job instead of starting another.
+Jobs live in process memory: they are forgotten on restart, and only the
+latest BACKUP_JOB_HISTORY (default 20) finished ones are kept, but finished
+files stay in BACKUP_DIR.
+
+Store: BACKUP_DIR holds the backup files plus `index.json`, which records
+each backup's kind, size, creation time and per-table checksums (row count
+and SHA-256 of the rows in id order), so listing backups reads one small
+file instead of stat-ing the directory.
+
+- A job first checksums the live tables. If they match the latest backup, no
+  file is written and the job points at that backup instead. Otherwise the
+  checksums stored for the new backup are taken from the rows it exported
+  (not the first pass), so writes in between can't make them disagree.
+- A *full* backup is a complete SQLite snapshot (see crud.export_database_to_sqlite).
+- An *incremental* backup holds only the rows inserted or changed since the
+  latest full backup (its `base`), plus the ids deleted since, in the
+  `backup_deletions` table. `materialize` turns it back into a full snapshot.
+- BACKUP_RETENTION (default 10, 0 = unlimited) full backups are kept; older
+  ones are deleted together with the incrementals based on them.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, delete, insert, inspect, select
+
+from . import crud, models
+
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_RETENTION = int(os.getenv("BACKUP_RETENTION", "10"))
+BACKUP_JOB_HISTORY = max(1, int(os.getenv("BACKUP_JOB_HISTORY", "20")))
+INDEX_FILENAME = "index.json"
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+FULL, INCREMENTAL = "full", "incremental"
+
+# Ids removed since the base backup; only present in incremental backups.
+deletions = Table(
+    "backup_deletions", MetaData(),
+    Column("table_name", String, primary_key=True),
+    Column("row_id", Integer, primary_key=True),
+)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backup")
+_lock = threading.Lock()
+_jobs = {}  # job id -> BackupJob, oldest first
+_active = {}  # kind -> the pending/running job of that kind
+
+
+# Checksums
+
+def _encode(row) -> bytes:
+    return json.dumps(list(row), default=str, separators=(",", ":")).encode() + b"\n"
+
+
+def table_checksums(bind, tables=None, batch_size: int = crud.EXPORT_BATCH_SIZE,
+                    columns: Optional[dict] = None) -> dict:
+    """{table name: {"rows": count, "sha256": digest of the rows in id order}}.
+
+    Streams each table like the export does. Values are hashed in their
+    Python form, so the same data gives the same checksums on SQLite and
+    Postgres. `columns` ({table name: [column names]}) restricts what is
+    hashed, e.g. to compare with a database from before a column existed.
+    """
+    tables = crud.BACKUP_TABLES if tables is None else tables
+    checksums = {}
+    with bind.connect() as conn:
+        streaming = conn.execution_options(stream_results=True, yield_per=batch_size)
+        for table in tables:
+            selected = [table.c[name] for name in columns[table.name]] if columns else table.c
+            digest = hashlib.sha256()
+            rows = 0
+            for batch in streaming.execute(select(*selected).order_by(table.c.id)).partitions():
+                for row in batch:
+                    digest.update(_encode(row))
+                rows += len(batch)
+            checksums[table.name] = {"rows": rows, "sha256": digest.hexdigest()}
+    return checksums
+
+
+def content_digest(checksums: dict) -> str:
+    """One digest for the whole database content."""
+    return hashlib.sha256(json.dumps(checksums, sort_keys=True).encode()).hexdigest()
+
+
+# Index
+
+def _path(filename: str) -> str:
+    return os.path.join(BACKUP_DIR, filename)
+
+
+def _save_index(entries: list):
+    # A uniquely named temporary file, so concurrent saves (a job and a
+    # first listing) never write into the same one.
+    with tempfile.NamedTemporaryFile("w", dir=BACKUP_DIR, suffix=".tmp", delete=False) as f:
+        json.dump({"backups": entries}, f, indent=1)
+    try:
+        os.replace(f.name, _path(INDEX_FILENAME))
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+def load_index() -> list:
+    """Backup entries, newest first.
+
+    Without an index (a backup directory from before it existed) the
+    directory is scanned once and its files are recorded as full backups
+    without checksums.
+    """
+    try:
+        with open(_path(INDEX_FILENAME)) as f:
+            return json.load(f)["backups"]
+    except FileNotFoundError:
+        pass
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    entries = []
+    for filename in os.listdir(BACKUP_DIR):
+        if filename.endswith(".db") and filename.startswith("football_backup_"):
+            file_stats = os.stat(_path(filename))
+            entries.append({
+                "filename": filename,
+                "kind": FULL,
+                "base": None,
+                "size_bytes": file_stats.st_size,
+                "created": datetime.fromtimestamp(file_stats.st_mtime).isoformat(),
+                "digest": None,
+                "tables": None,
+            })
+    entries.sort(key=lambda e: e["created"], reverse=True)
+    _save_index(entries)
+    return entries
+
+
+def _apply_retention(entries: list) -> list:
+    """Drop full backups beyond BACKUP_RETENTION and the incrementals based on them."""
+    if BACKUP_RETENTION <= 0:
+        return entries
+    fulls = [e["filename"] for e in entries if e["kind"] == FULL]
+    kept_fulls = set(fulls[:BACKUP_RETENTION])
+    kept, dropped = [], []
+    for entry in entries:
+        base = entry["filename"] if entry["kind"] == FULL else entry["base"]
+        (kept if base in kept_fulls else dropped).append(entry)
+    for entry in dropped:
+        try:
+            os.remove(_path(entry["filename"]))
+        except FileNotFoundError:
+            pass
+    return kept
+
+
+# Incremental export / materialize
+
+def _same_columns(path: str) -> bool:
+    """Whether a backup file has the current schema (older backups may lack columns)."""
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        inspector = inspect(engine)
+        return all(
+            inspector.has_table(table.name)
+            and {c["name"] for c in inspector.get_columns(table.name)} == set(table.c.keys())
+            for table in crud.BACKUP_TABLES
+        )
+    finally:
+        engine.dispose()
+
+
+def _diff(live, old):
+    """Merge two id-ordered row streams into ("upsert", row) / ("delete", id)."""
+    live_row, old_row = next(live, None), next(old, None)
+    while live_row is not None or old_row is not None:
+        if old_row is None or (live_row is not None and live_row.id < old_row.id):
+            yield "upsert", live_row
+            live_row = next(live, None)
+        elif live_row is None or old_row.id < live_row.id:
+            yield "delete", old_row.id
+            old_row = next(old, None)
+        else:
+            if tuple(live_row) != tuple(old_row):
+                yield "upsert", live_row
+            live_row, old_row = next(live, None), next(old, None)
+
+
+def export_incremental(dest_path: str, base_path: str, src_engine=None,
+                       batch_size: int = crud.EXPORT_BATCH_SIZE, progress=None):
+    """Write the rows that differ from the backup at `base_path` into a new
+    SQLite file: new and changed rows in their tables, removed ids in
+    `backup_deletions`. Both sides are streamed in id order.
+
+    Returns the table_checksums of the live rows as they were read, i.e. of
+    the content the new backup stands for.
+    """
+    if src_engine is None:
+        from .database import engine as src_engine
+
+    base_engine = create_engine(f"sqlite:///{base_path}")
+    dst_engine = create_engine(f"sqlite:///{dest_path}")
+    checksums = {}
+    try:
+        models.Base.metadata.create_all(bind=dst_engine)
+        deletions.create(bind=dst_engine)
+        with src_engine.connect() as sconn, base_engine.connect() as bconn, dst_engine.begin() as dconn:
+            streaming = sconn.execution_options(stream_results=True, yield_per=batch_size)
+            for table in crud.BACKUP_TABLES:
+                ordered = select(table).order_by(table.c.id)
+                upserts, deleted = [], []
+                digest = hashlib.sha256()
+                checksums[table.name] = {"rows": 0}
+
+                def live_rows():
+                    for row in streaming.execute(ordered):
+                        digest.update(_encode(row))
+                        checksums[table.name]["rows"] += 1
+                        yield row
+
+                def flush():
+                    if upserts:
+                        dconn.execute(insert(table), upserts)
+                    if deleted:
+                        dconn.execute(insert(deletions), deleted)
+                    if progress is not None:
+                        progress(table.name, len(upserts) + len(deleted))
+                    upserts.clear()
+                    deleted.clear()
+
+                for op, value in _diff(live_rows(), iter(bconn.execute(ordered))):
+                    if op == "upsert":
+                        upserts.append(dict(value._mapping))
+                    else:
+                        deleted.append({"table_name": table.name, "row_id": value})
+                    if len(upserts) + len(deleted) >= batch_size:
+                        flush()
+                flush()
+                checksums[table.name]["sha256"] = digest.hexdigest()
+    finally:
+        base_engine.dispose()
+        dst_engine.dispose()
+    return checksums
+
+
+def materialize(filename: str, dest_path: str):
+    """Write the full snapshot a backup stands for to `dest_path`."""
+    entry = next((e for e in load_index() if e["filename"] == filename), None)
+    if entry is None:
+        raise ValueError(f"Unknown backup {filename}")
+    if entry["kind"] == FULL:
+        shutil.copyfile(_path(filename), dest_path)
+        return
+    shutil.copyfile(_path(entry["base"]), dest_path)
+    diff_engine = create_engine(f"sqlite:///{_path(filename)}")
+    dst_engine = create_engine(f"sqlite:///{dest_path}")
+    try:
+        with diff_engine.connect() as diff, dst_engine.begin() as dconn:
+            for table in crud.BACKUP_TABLES:
+                removed = select(deletions.c.row_id).where(deletions.c.table_name == table.name)
+                dconn.execute(delete(table).where(table.c.id.in_([r for r, in diff.execute(removed)])))
+                for batch in diff.execute(select(table)).mappings().partitions(crud.EXPORT_BATCH_SIZE):
+                    rows = [dict(r) for r in batch]
+                    dconn.execute(delete(table).where(table.c.id.in_([r["id"] for r in rows])))
+                    dconn.execute(insert(table), rows)
+    finally:
+        diff_engine.dispose()
+        dst_engine.dispose()
+
+
+# Jobs
+
+class BackupJob:
+    """State of one backup, updated by the worker thread as it copies rows."""
+
+    def __init__(self, kind: str = FULL):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = PENDING
+        self.created = datetime.now()
+        self.finished = None
+        self.filename = None
+        self.unchanged = False
+        self.tables_total = len(crud.BACKUP_TABLES)
+        self.tables_done = 0
+        self.current_table = None
+        self.rows_copied = 0
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def path(self) -> Optional[str]:
+        return _path(self.filename) if self.filename else None
+
+    def on_progress(self, table_name: str, rows: int):
+        if table_name != self.current_table:
+            if self.current_table is not None:
+                self.tables_done += 1
+            self.current_table = table_name
+        self.rows_copied += rows
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job has finished (successfully or not)."""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "filename": self.filename,
+            "unchanged": self.unchanged,
+            "created": self.created.isoformat(),
+            "finished": self.finished.isoformat() if self.finished else None,
+            "tables_total": self.tables_total,
+            "tables_done": self.tables_done,
+            "current_table": self.current_table,
+            "rows_copied": self.rows_copied,
+            "error": self.error,
+        }
+
+
+def _file_checksums(path: str) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        return table_checksums(engine)
+    finally:
+        engine.dispose()
+
+
+def _new_filename(created: datetime, kind: str) -> str:
+    stem = f"football_backup_{created.strftime('%Y%m%d_%H%M%S')}"
+    suffix = ".db" if kind == FULL else ".incremental.db"
+    filename, n = stem + suffix, 1
+    while os.path.exists(_path(filename)):
+        filename, n = f"{stem}_{n}{suffix}", n + 1
+    return filename
+
+
+def _set_kind(job: BackupJob, kind: str):
+    """Change a running job's kind, and the kind it is registered as active
+    under, so start_backup(kind) joins it instead of queueing another."""
+    with _lock:
+        if _active.get(job.kind) is job:
+            del _active[job.kind]
+        job.kind = kind
+        _active.setdefault(kind, job)
+
+
+def _run(job: BackupJob):
+    from .database import engine
+
+    job.status = RUNNING
+    try:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        checksums = table_checksums(engine)
+        digest = content_digest(checksums)
+        entries = [e for e in load_index() if os.path.exists(_path(e["filename"]))]
+
+        base = next((e for e in entries if e["kind"] == FULL), None)
+        if job.kind == INCREMENTAL and (
+            base is None or not _same_columns(_path(base["filename"]))
+        ):
+            _set_kind(job, FULL)  # nothing usable to diff against
+        # An incremental may reuse any backup with the same content, a full only a full one.
+        previous = next((e for e in entries if job.kind == INCREMENTAL or e["kind"] == FULL), None)
+
+        if previous is not None and previous["digest"] == digest:
+            job.filename = previous["filename"]
+            _set_kind(job, previous["kind"])
+            job.unchanged = True
+        else:
+            job.filename = _new_filename(job.created, job.kind)
+            if job.kind == FULL:
+                crud.export_database_to_sqlite(job.path, progress=job.on_progress)
+                checksums = _file_checksums(job.path)
+            else:
+                checksums = export_incremental(job.path, _path(base["filename"]), progress=job.on_progress)
+            digest = content_digest(checksums)
+            entries.insert(0, {
+                "filename": job.filename,
+                "kind": job.kind,
+                "base": base["filename"] if job.kind == INCREMENTAL else None,
+                "size_bytes": os.path.getsize(job.path),
+                "created": job.created.isoformat(),
+                "digest": digest,
+                "tables": checksums,
+            })
+        _save_index(_apply_retention(entries))
+        job.tables_done = job.tables_total
+        job.current_table = None
+        job.status = DONE
+    except Exception as e:
+        job.status = FAILED
+        job.error = str(e)
+    finally:
+        job.finished = datetime.now()
+        with _lock:
+            for kind, active in list(_active.items()):
+                if active is job:
+                    del _active[kind]
+            finished = [j for j in _jobs.values() if j.status in (DONE, FAILED)]
+            for old in finished[:-BACKUP_JOB_HISTORY]:
+                del _jobs[old.id]
+        job._done.set()
+
+
+def start_backup(kind: str = FULL) -> BackupJob:
+    """Enqueue a backup, or return the one of that kind already pending/running."""
+    with _lock:
+        if kind in _active:
+            return _active[kind]
+        job = BackupJob(kind)
+        _jobs[job.id] = job
+        _active[kind] = job
+    _executor.submit(_run, job)
+    return job
+
+
+def get_job(job_id: str) -> Optional[BackupJob]:
+    return _jobs.get(job_id)
@@ -0,0 +1,138 @@
+"""Parsing and validation for the bulk import endpoints.
+
+Rows are validated all at once so the client gets every problem in one
+response: each error names the (1-based) row it belongs to. Nothing is
+written unless every row is valid (see crud.create_matches_bulk and
+crud.upsert_players).
+
+Matches come as a JSON list of schemas.MatchCreate objects, or as CSV with
+the columns
+
+    date,team_young_score,team_old_score,goals
+
+where `goals` lists `player_id:team` entries separated by `;`, with `:own`
+appended for own goals, e.g. `2024-09-01,3,1,"12:young;12:young;7:young;3:old:own"`.
+
+Players (a roster) come as a JSON list of schemas.PlayerCreate objects, or
+as CSV with the columns `name,birthdate` (birthdate as YYYY-MM-DD).
+"""
+import csv
+import io
+import json
+from collections import defaultdict
+from typing import List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+
+TEAMS = ("young", "old")
+MATCH_CSV_COLUMNS = ("date", "team_young_score", "team_old_score", "goals")
+PLAYER_CSV_COLUMNS = ("name", "birthdate")
+
+
+def _messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(p) for p in e['loc'])}: {e['msg']}" if e["loc"] else e["msg"]
+        for e in error.errors()
+    ]
+
+
+def _parse_goals(cell: str) -> List[dict]:
+    goals = []
+    for entry in filter(None, (part.strip() for part in (cell or "").split(";"))):
+        fields = entry.split(":")
+        if len(fields) not in (2, 3) or (len(fields) == 3 and fields[2] != "own"):
+            raise ValueError(f"goal '{entry}' is not player_id:team or player_id:team:own")
+        goals.append({"player_id": fields[0], "team": fields[1], "is_own_goal": len(fields) == 3})
+    return goals
+
+
+def _parse_body(body: bytes, content_type: str, csv_columns) -> List[dict]:
+    """Raw rows from a JSON list or (for text/csv) a CSV body with `csv_columns`."""
+    if content_type.startswith("text/csv"):
+        try:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+        except UnicodeDecodeError as e:
+            raise ValueError(f"CSV is not UTF-8: {e}")
+        missing = set(csv_columns) - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"CSV is missing columns: {', '.join(sorted(missing))}")
+        return list(reader)
+    try:
+        rows = json.loads(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON: {e}")
+    if not isinstance(rows, list):
+        raise ValueError("Expected a JSON list")
+    return rows
+
+
+def parse_matches(body: bytes, content_type: str) -> List[dict]:
+    """Raw match rows (still unvalidated dicts) from a JSON or CSV body.
+
+    Raises ValueError if the body as a whole can't be read; problems within
+    a row are left to validate_matches.
+    """
+    rows = _parse_body(body, content_type, MATCH_CSV_COLUMNS)
+    if content_type.startswith("text/csv"):
+        for row in rows:
+            try:
+                row["goals"] = _parse_goals(row["goals"])
+            except ValueError as e:
+                row["goals"] = e  # reported by validate_matches with its row number
+    return rows
+
+
+def parse_players(body: bytes, content_type: str) -> List[dict]:
+    """Raw roster rows from a JSON or CSV body; see parse_matches."""
+    return _parse_body(body, content_type, PLAYER_CSV_COLUMNS)
+
+
+def validate_players(rows: List[dict]) -> Tuple[List[schemas.PlayerCreate], List[dict]]:
+    """(players, errors) like validate_matches. Names must be unique within
+    the roster, since each name is one row of the upsert."""
+    players, errors, seen = [], [], {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            player = schemas.PlayerCreate.model_validate(row)
+        except ValidationError as e:
+            errors.append({"row": number, "errors": _messages(e)})
+            continue
+        if player.name in seen:
+            errors.append({"row": number, "errors": [f"name: duplicate of row {seen[player.name]}"]})
+            continue
+        seen[player.name] = number
+        players.append(player)
+    return players, errors
+
+
+def validate_matches(db: Session, rows: List[dict]) -> Tuple[List[schemas.MatchCreate], List[dict]]:
+    """(matches, errors). Player ids are checked with a single query;
+    errors are {"row": n, "errors": [...]} for each invalid row."""
+    parsed = []  # (row number, MatchCreate)
+    errors = defaultdict(list)
+    for number, row in enumerate(rows, start=1):
+        if isinstance(row, dict) and isinstance(row.get("goals"), ValueError):
+            errors[number].append(f"goals: {row['goals']}")
+            continue
+        try:
+            match = schemas.MatchCreate.model_validate(row)
+        except ValidationError as e:
+            errors[number].extend(_messages(e))
+            continue
+        for i, goal in enumerate(match.goals):
+            if goal.team not in TEAMS:
+                errors[number].append(f"goals.{i}.team: must be one of {', '.join(TEAMS)}")
+        parsed.append((number, match))
+
+    player_ids = {goal.player_id for _, match in parsed for goal in match.goals}
+    known = set(db.scalars(select(models.Player.id).where(models.Player.id.in_(player_ids)))) if player_ids else set()
+    for number, match in parsed:
+        unknown = sorted({goal.player_id for goal in match.goals} - known)
+        if unknown:
+            errors[number].append(f"unknown player ids: {', '.join(map(str, unknown))}")
+
+    return [match for _, match in parsed], [{"row": n, "errors": errors[n]} for n in sorted(errors)]
@@ -0,0 +1,165 @@
+"""Versioned in-process cache for the read endpoints, with ETag support.
+
+The data only changes when somebody commits a write, which happens a few
+times a week. Every commit through an ORM session bumps a monotonically
+increasing data version. Read endpoints are cached per request variant
+(path, query, Accept, brotli) for as long as the version stays the same.
+The query string is client-controlled, so at most CACHE_MAX_ENTRIES bodies
+are kept, least recently used first out.
+Their ETag is derived from the version, so a client that revalidates with
+If-None-Match gets a 304 without touching the database.
+
+The cache is per process, so it is only correct with a single worker (which
+is what start.sh runs): a write bumps the version of the process that handled
+it, and other workers would keep serving their stale bodies until they handle
+a write themselves. The ETag embeds a per-process epoch so tags from before a
+restart never match.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Revalidate on every use: the browser keeps the body but must ask (cheaply,
+# via If-None-Match) whether it is still current. This includes finished
+# seasons (app/stats.py snapshots): they practically never change, but an admin
+# correction must reach clients right away, and revalidating against the
+# snapshot's own ETag is a 304 that does not touch the stats tables.
+CACHE_CONTROL = "private, no-cache"
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+
+_EPOCH = f"{os.getpid():x}.{time.time_ns():x}"
+_lock = threading.Lock()
+_version = 0
+_entries = OrderedDict()  # variant key -> (version, body, media_type, headers), oldest use first
+
+
+def current_version() -> int:
+    return _version
+
+
+def bump_version() -> int:
+    """Record that the data changed: drop every cached body."""
+    global _version
+    with _lock:
+        _version += 1
+        _entries.clear()
+        return _version
+
+
+# Session.info key marking a transaction that only wrote derived data.
+_DERIVED_ONLY = "cache_derived_only"
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.get(_DERIVED_ONLY):
+        return
+    bump_version()
+
+
+def commit_derived(session: Session):
+    """Commit a transaction that only wrote derived data (e.g. a season
+    snapshot built by a GET), without dropping every cached body."""
+    session.info[_DERIVED_ONLY] = True
+    try:
+        session.commit()
+    finally:
+        del session.info[_DERIVED_ONLY]
+
+
+def variant_key(request: Request) -> str:
+    """Everything the response body can depend on besides the data itself."""
+    accept_encoding = request.headers.get("accept-encoding", "")
+    return "|".join((
+        request.url.path,
+        "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items())),
+        request.headers.get("accept", ""),
+        "br" if "br" in accept_encoding else "",
+    ))
+
+
+def etag_for(key: str, version: int) -> str:
+    digest = hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
+    return f'W/"{_EPOCH}.{version}.{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def conditional_response(request: Request, body: bytes, etag: str, cache_control: str,
+                         media_type: str = "application/json") -> Response:
+    """Serve a body whose ETag is known up front, or 304 if the client has it."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _lookup(request: Request):
+    """(key, version, headers, response): a 304 or cached response when the
+    request can be answered without building the body, else None."""
+    version = current_version()
+    key = variant_key(request)
+    etag = etag_for(key, version)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if _matches(request.headers.get("if-none-match", ""), etag):
+        return key, version, headers, Response(status_code=304, headers=headers)
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+    if entry is not None and entry[0] == version:
+        _, body, media_type, extra_headers = entry
+        return key, version, headers, Response(
+            content=body, media_type=media_type, headers={**extra_headers, **headers}
+        )
+    return key, version, headers, None
+
+
+def _store(key: str, version: int, headers: dict, response: Response) -> Response:
+    if response.status_code != 200:
+        return response
+    extra_headers = {
+        k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "content-type")
+    }
+    with _lock:
+        # Don't store a body that a concurrent write may already have made stale.
+        if _version == version:
+            _entries[key] = (version, response.body, response.media_type, extra_headers)
+            _entries.move_to_end(key)
+            while len(_entries) > CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+    response.headers.update(headers)
+    return response
+
+
+def cached_response(request: Request, build: Callable[[], Response]) -> Response:
+    """Serve `build()`'s response from the cache, or 304 if the client is current.
+
+    `build` must return a fully rendered Response (status 200); anything else
+    is passed through uncached.
+    """
+    key, version, headers, response = _lookup(request)
+    if response is not None:
+        return response
+    return _store(key, version, headers, build())
+
+
+async def cached_response_async(request: Request, build: Callable[[], Awaitable[Response]]) -> Response:
+    """cached_response for async handlers: `build` is a coroutine function."""
+    key, version, headers, response = _lookup(request)
+    if response is not None:
+        return response
+    return _store(key, version, headers, await build())
@@ -0,0 +1,102 @@
+"""Compact, columnar response format for the player and match lists.
+
+The default JSON embeds a full ShallowMatch in every goal of every player (and
+a ShallowPlayer in every goal of every match), so the same object is serialized
+many times over. The compact format normalizes the data into three id-linked
+tables, each encoded column-wise:
+
+    {
+      "players": {"id": [...], "name": [...], "birthdate": [...]},
+      "matches": {"id": [...], "date": [...], "team_young_score": [...], "team_old_score": [...]},
+      "goals":   {"id": [...], "match_id": [...], "player_id": [...], "is_own_goal": [...], "team": [...]}
+    }
+
+Clients opt in with `?format=compact` or `Accept: application/vnd.sgks.compact+json`.
+orjson and brotli are used when installed (`uv sync --extra fast`); otherwise
+the stdlib json encoder and the app-wide gzip middleware are used.
+"""
+import json
+from datetime import date
+from typing import Optional
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPACT_MEDIA_TYPE = "application/vnd.sgks.compact+json"
+
+PLAYER_FIELDS = ("id", "name", "birthdate")
+MATCH_FIELDS = ("id", "date", "team_young_score", "team_old_score")
+GOAL_FIELDS = ("id", "match_id", "player_id", "is_own_goal", "team")
+
+# Brotli quality 5 compresses a little better than gzip -9 at a fraction of
+# the CPU cost of the maximum (11), which matters when encoding per request.
+BROTLI_QUALITY = 5
+
+
+def wants_compact(request: Request, response_format: Optional[str]) -> bool:
+    """Whether the client asked for the compact representation."""
+    if response_format is not None:
+        return response_format == "compact"
+    return COMPACT_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _columns(rows, fields) -> dict:
+    return {field: [getattr(row, field) for row in rows] for field in fields}
+
+
+def _tables(players, matches, goals) -> dict:
+    return {
+        "players": _columns(players, PLAYER_FIELDS),
+        "matches": _columns(matches, MATCH_FIELDS),
+        "goals": _columns(goals, GOAL_FIELDS),
+    }
+
+
+def from_players(players) -> dict:
+    """Normalize a player list (with goals and their matches loaded)."""
+    goals = [g for p in players for g in p.goals]
+    matches = {g.match.id: g.match for g in goals if g.match is not None}
+    return _tables(players, sorted(matches.values(), key=lambda m: (m.date, m.id)), goals)
+
+
+def from_matches(matches) -> dict:
+    """Normalize a match list (with goals and their players loaded)."""
+    goals = [g for m in matches for g in m.goals]
+    players = {g.player.id: g.player for g in goals if g.player is not None}
+    return _tables(sorted(players.values(), key=lambda p: (p.name, p.id)), matches, goals)
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """Encode to compact JSON bytes (orjson if available)."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+def compact_response(request: Request, payload: dict, headers: Optional[dict] = None) -> Response:
+    """Encode a compact payload, brotli-compressed when the client accepts it.
+
+    Everything else is left to the gzip middleware, which skips responses that
+    already carry a Content-Encoding.
+    """
+    body = dumps(payload)
+    headers = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+    if brotli is not None and "br" in request.headers.get("accept-encoding", ""):
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+        headers["Content-Encoding"] = "br"
+    return Response(content=body, media_type=COMPACT_MEDIA_TYPE, headers=headers)
@@ -1,83 +1,373 @@
-from sqlalchemy.orm import Session, joinedload
-from . import models, schemas
-from typing import List
+import base64
+import json
+from datetime import date
+from sqlalchemy import and_, case, delete, false, func, insert, literal_column, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload, load_only, noload, selectinload, with_loader_criteria
+from . import models, schemas, stats, tallies
+from .database import upsert_insert
+from .season import season_start_year
+from typing import List, Optional
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset cursor for the last row of a page (dates as ISO strings)."""
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+def _keyset(stmt, order_by, cursor: Optional[str], limit: Optional[int], key):
+    """Keyset pagination on the `order_by` columns (the last one must be unique).
+
+    Restricts a select() to the rows after `cursor`, fetching one row more
+    than `limit` so that `keyset_page` can tell whether another page follows.
+    Without a limit everything after the cursor is selected.
+    """
+    if cursor is not None:
+        try:
+            values = key(decode_cursor(cursor))
+        except (TypeError, ValueError) as e:
+            # Well-formed JSON with the wrong types, e.g. a number for a date.
+            raise ValueError("Invalid cursor") from e
+        stmt = stmt.where(tuple_(*order_by) > tuple_(*values))
+    stmt = stmt.order_by(*order_by)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+def keyset_page(rows, order_by, limit: Optional[int]):
+    """(rows, next_cursor) from the result of a `_keyset` statement;
+    next_cursor is None on the last page."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*(getattr(rows[-1], c.key) for c in order_by))
+
+def _match_ids_in_range(season: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Subquery of match ids in a season and/or inclusive date range, or None if unfiltered."""
+    if season is None and date_from is None and date_to is None:
+        return None
+    stmt = select(models.Match.id)
+    if season is not None:
+        stmt = stmt.where(models.Match.season_start_year == season)
+    if date_from is not None:
+        stmt = stmt.where(models.Match.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(models.Match.date <= date_to)
+    return stmt
+
+# Read-path loader options. Collections are fetched with one batched
+# "SELECT ... WHERE id IN (...)" per relationship instead of a JOIN that repeats
+# the parent's columns once per goal, and only the columns the response schemas
+# (schemas.Goal / ShallowMatch / ShallowPlayer) serialize are loaded. The
+# back-reference of each goal (goal.player / goal.match) is the already-loaded
+# parent, so it resolves from the identity map without another query.
+_GOAL_COLUMNS = (models.Goal.id, models.Goal.match_id, models.Goal.player_id, models.Goal.is_own_goal, models.Goal.team)
+_SHALLOW_MATCH_COLUMNS = (models.Match.id, models.Match.date, models.Match.team_young_score, models.Match.team_old_score)
+_SHALLOW_PLAYER_COLUMNS = (models.Player.id, models.Player.name, models.Player.birthdate)
+
+PLAYER_GOALS_LOADER = selectinload(models.Player.goals).options(
+    load_only(*_GOAL_COLUMNS),
+    selectinload(models.Goal.match).load_only(*_SHALLOW_MATCH_COLUMNS),
+)
+MATCH_GOALS_LOADER = selectinload(models.Match.goals).options(
+    load_only(*_GOAL_COLUMNS),
+    selectinload(models.Goal.player).load_only(*_SHALLOW_PLAYER_COLUMNS),
+)
 
 def get_player(db: Session, player_id: int):
     return db.query(models.Player).filter(models.Player.id == player_id).first()
 
-def get_players(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Player).options(
-        joinedload(models.Player.goals).joinedload(models.Goal.match)
-    ).offset(skip).limit(limit).all()
+PLAYER_ORDER = (models.Player.name, models.Player.id)
+MATCH_ORDER = (models.Match.date, models.Match.id)
 
-def create_player(db: Session, player: schemas.PlayerCreate):
-    # Check if player with this name already exists
-    existing_player = db.query(models.Player).filter(models.Player.name == player.name).first()
-    if existing_player:
-        return None  # Return None to indicate duplicate name
-    
-    db_player = models.Player(name=player.name, birthdate=player.birthdate)
-    db.add(db_player)
-    db.commit()
-    db.refresh(db_player)
-    return db_player
+def players_statement(cursor: Optional[str] = None, limit: Optional[int] = None,
+                      season: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """select() for one page of players; shared by get_players and async_crud."""
+    stmt = select(models.Player).options(PLAYER_GOALS_LOADER)
+    match_ids = _match_ids_in_range(season, date_from, date_to)
+    if match_ids is not None:
+        stmt = stmt.options(
+            with_loader_criteria(models.Goal, models.Goal.match_id.in_(match_ids))
+        )
+    return _keyset(stmt, PLAYER_ORDER, cursor, limit, key=lambda v: (str(v[0]), int(v[1])))
 
-def delete_player(db: Session, player_id: int):
-    """Delete a player and reassign their goals to the unknown player."""
-    player = db.query(models.Player).filter(models.Player.id == player_id).first()
-    if not player:
-        return None
-    
-    # Don't delete the unknown player
-    if player.name == "Unknown Player (Deleted)":
-        return None
-    
-    # Get or create unknown player BEFORE deleting the original player
-    unknown_player = models.Player.get_unknown_player(db)
-    
-    # Reassign all goals from this player to unknown player
-    goals_to_reassign = db.query(models.Goal).filter(models.Goal.player_id == player_id).all()
+def get_players(db: Session, cursor: Optional[str] = None, limit: Optional[int] = None,
+                season: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """Players ordered by (name, id), one keyset page at a time.
+
+    The season / date filters restrict which goals are embedded; every player
+    is still listed. Returns (players, next_cursor).
+    """
+    stmt = players_statement(cursor, limit, season, date_from, date_to)
+    return keyset_page(db.scalars(stmt).all(), PLAYER_ORDER, limit)
 
-    # Update goals in a separate transaction to ensure they're saved
-    for goal in goals_to_reassign:
-        goal.player_id = unknown_player.id
+def _player_upsert(db: Session, players: List[schemas.PlayerCreate], update_existing: bool):
+    """Write a roster with one INSERT ... ON CONFLICT (name) statement.
 
-    # Remove this player's visibility overrides (goals move to unknown player,
-    # but visibility rows are player-specific and would otherwise be orphaned).
-    db.query(models.PlayerVisibility).filter(
-        models.PlayerVisibility.player_id == player_id
-    ).delete()
+    Existing names are left alone, or (update_existing) get the new birthdate
+    if it differs. Returns (id, inserted) for each row written; names left
+    alone return nothing. Part of the caller's transaction.
+    """
+    table = models.Player.__table__
+    bind = db.get_bind()
+    stmt = upsert_insert(bind, table).values([{"name": p.name, "birthdate": p.birthdate} for p in players])
+    if not update_existing:
+        # A name that is taken returns no row, so every row returned was
+        # inserted: one statement on either database.
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.name])
+        return [(id, True) for id, in db.execute(stmt.returning(table.c.id))]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={"birthdate": stmt.excluded.birthdate},
+        where=table.c.birthdate.is_distinct_from(stmt.excluded.birthdate),
+    )
+    if bind.dialect.name == "postgresql":
+        # xmax is 0 for a row version created by an INSERT, not an UPDATE.
+        return db.execute(stmt.returning(table.c.id, literal_column("xmax") == 0)).all()
+    # SQLite has no such marker (and a subquery in RETURNING sees the rows
+    # already written), so note which names existed before the insert. The
+    # no-op UPDATE takes the write lock first, so no other writer can add
+    # one of them in between.
+    db.execute(update(table).where(false()).values(id=table.c.id))
+    existing = set(db.scalars(select(table.c.name).where(table.c.name.in_([p.name for p in players]))))
+    return [(id, name not in existing) for id, name in db.execute(stmt.returning(table.c.id, table.c.name))]
+
+def upsert_players(db: Session, players: List[schemas.PlayerCreate], update_existing: bool = True):
+    """Add a roster in one statement, matching existing players by name.
 
-    # Commit the goal reassignments first
+    Returns the counts of players added, updated (birthdate changed) and
+    skipped (already there as given, or not updated). The names must be
+    unique within `players` (bulk_import.validate_players).
+    """
+    if not players:
+        return {"added": 0, "updated": 0, "skipped": 0, "total_requested": 0}
+    written = _player_upsert(db, players, update_existing)
+    added = sum(1 for _, inserted in written if inserted)
+    if len(written) > added:
+        # A changed birthdate moves the player between age teams.
+        stats.invalidate_season_snapshots(db)
     db.commit()
-    
-    # Now delete the player
-    db.delete(player)
+    return {
+        "added": added,
+        "updated": len(written) - added,
+        "skipped": len(players) - len(written),
+        "total_requested": len(players),
+    }
+
+def create_player(db: Session, player: schemas.PlayerCreate):
+    """Insert a player. Returns None if the name is taken; the unique
+    constraint decides, so concurrent signups can't both get it."""
+    written = _player_upsert(db, [player], update_existing=False)
+    if not written:
+        db.rollback()
+        return None  # Return None to indicate duplicate name
     db.commit()
-    
+    return db.get(models.Player, written[0][0])
+
+def delete_players(db: Session, player_ids: List[int]):
+    """Delete several players and reassign their goals to the unknown player.
+
+    Set-based, in one transaction: one UPDATE moves all their goals, their
+    visibility overrides and the players themselves go with one DELETE each,
+    and the tallies of the players involved are recomputed. Ids that don't
+    exist (and the unknown player itself) are skipped and reported.
+    """
+    names = dict(db.execute(
+        select(models.Player.id, models.Player.name).where(
+            models.Player.id.in_(player_ids), models.Player.name != stats.UNKNOWN_PLAYER_NAME
+        )
+    ).all())
+    ids = list(names)
+    reassigned = 0
+    if ids:
+        unknown_id = models.Player.unknown_player_id(db)
+        reassigned = db.execute(
+            update(models.Goal).where(models.Goal.player_id.in_(ids)).values(player_id=unknown_id),
+            execution_options={"synchronize_session": False},
+        ).rowcount
+        # Visibility rows are player-specific and would otherwise be orphaned.
+        db.execute(delete(models.PlayerVisibility).where(models.PlayerVisibility.player_id.in_(ids)),
+                   execution_options={"synchronize_session": False})
+        # Their goals leave the leaderboards of every season.
+        stats.invalidate_season_snapshots(db)
+        tallies.recompute(db, [*ids, unknown_id])
+        db.execute(delete(models.Player.__table__).where(models.Player.__table__.c.id.in_(ids)))
+        db.commit()
     return {
-        "deleted_player": player.name,
-        "reassigned_goals": len(goals_to_reassign)
+        "deleted_players": [names[i] for i in ids],
+        "reassigned_goals": reassigned,
+        "skipped": [i for i in dict.fromkeys(player_ids) if i not in names],
+    }
+
+def delete_player(db: Session, player_id: int):
+    """Delete a player and reassign their goals to the unknown player.
+    Returns None if the player doesn't exist or is the unknown player."""
+    result = delete_players(db, [player_id])
+    if not result["deleted_players"]:
+        return None
+    return {
+        "deleted_player": result["deleted_players"][0],
+        "reassigned_goals": result["reassigned_goals"],
     }
 
 def get_match(db: Session, match_id: int):
-    return db.query(models.Match).options(
-        joinedload(models.Match.goals).joinedload(models.Goal.player)
-    ).filter(models.Match.id == match_id).first()
+    return db.query(models.Match).options(MATCH_GOALS_LOADER).filter(models.Match.id == match_id).first()
+
+def matches_statement(cursor: Optional[str] = None, limit: Optional[int] = None,
+                      season: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      player_id: Optional[int] = None):
+    """select() for one page of matches; shared by get_matches and async_crud."""
+    stmt = select(models.Match).options(MATCH_GOALS_LOADER)
+    if season is not None:
+        stmt = stmt.where(models.Match.season_start_year == season)
+    if date_from is not None:
+        stmt = stmt.where(models.Match.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(models.Match.date <= date_to)
+    if player_id is not None:
+        stmt = stmt.where(models.Match.id.in_(
+            select(models.Goal.match_id).where(models.Goal.player_id == player_id)
+        ))
+    return _keyset(stmt, MATCH_ORDER, cursor, limit, key=lambda v: (date.fromisoformat(v[0]), int(v[1])))
 
-def get_matches(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Match).options(
-        joinedload(models.Match.goals).joinedload(models.Goal.player)
-    ).offset(skip).limit(limit).all()
+def get_matches(db: Session, cursor: Optional[str] = None, limit: Optional[int] = None,
+                season: Optional[int] = None, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                player_id: Optional[int] = None):
+    """Matches ordered by (date, id), one keyset page at a time.
+
+    `player_id` keeps only matches in which that player has a goal.
+    Returns (matches, next_cursor).
+    """
+    stmt = matches_statement(cursor, limit, season, date_from, date_to, player_id)
+    return keyset_page(db.scalars(stmt).all(), MATCH_ORDER, limit)
 
 def create_match(db: Session, match: schemas.MatchCreate):
-    db_match = models.Match(date=match.date, team_young_score=match.team_young_score, team_old_score=match.team_old_score)
+    db_match = models.Match(
+        date=match.date,
+        season_start_year=season_start_year(match.date),
+        team_young_score=match.team_young_score,
+        team_old_score=match.team_old_score,
+    )
     db.add(db_match)
+    # Backfilling a finished season changes its frozen stats.
+    stats.invalidate_season_snapshots(db, [db_match.season_start_year])
     db.commit()
     db.refresh(db_match)
     for goal in match.goals:
         db_goal = models.Goal(match_id=db_match.id, player_id=goal.player_id, is_own_goal=goal.is_own_goal, team=goal.team)
         db.add(db_goal)
+    tallies.apply_delta(db, tallies.match_delta(
+        db_match.season_start_year, [(g.player_id, g.is_own_goal, g.team) for g in match.goals]
+    ))
+    db.commit()
+    db.refresh(db_match)
+    return db_match
+
+def create_matches_bulk(db: Session, matches: List[schemas.MatchCreate]) -> List[int]:
+    """Insert many matches and their goals in one transaction, set-based.
+
+    One multi-row INSERT ... RETURNING for the matches, one executemany for
+    all goals, one tally upsert and one snapshot invalidation, then a single
+    commit. The matches must already be validated (bulk_import.validate_matches).
+    Returns the new match ids in input order.
+    """
+    if not matches:
+        return []
+    seasons = [season_start_year(m.date) for m in matches]
+    match_ids = list(db.scalars(
+        insert(models.Match).returning(models.Match.id, sort_by_parameter_order=True),
+        [
+            {"date": m.date, "season_start_year": season,
+             "team_young_score": m.team_young_score, "team_old_score": m.team_old_score}
+            for m, season in zip(matches, seasons)
+        ],
+    ))
+    goal_rows = [
+        {"match_id": match_id, "player_id": g.player_id, "is_own_goal": g.is_own_goal, "team": g.team}
+        for match_id, m in zip(match_ids, matches) for g in m.goals
+    ]
+    if goal_rows:
+        db.execute(insert(models.Goal), goal_rows)
+    tallies.apply_delta(db, tallies.merge(*(
+        tallies.match_delta(season, [(g.player_id, g.is_own_goal, g.team) for g in m.goals])
+        for m, season in zip(matches, seasons)
+    )))
+    stats.invalidate_season_snapshots(db, sorted(set(seasons)))
+    db.commit()
+    return match_ids
+
+def _goal_key(goal):
+    return (goal.player_id, bool(goal.is_own_goal), goal.team)
+
+def diff_goals(existing, submitted):
+    """Minimal changes turning a match's `existing` goal rows into `submitted`.
+
+    Goals with the same (player_id, is_own_goal, team) are interchangeable, so
+    the two lists are compared as multisets: matching goals are kept as they
+    are, surplus rows are rewritten into missing goals, and only what is left
+    over is inserted or deleted. Returns (updates, inserts, deletes) where
+    updates are (row, goal) pairs.
+    """
+    unmatched = {}
+    for row in existing:
+        unmatched.setdefault(_goal_key(row), []).append(row)
+    missing = []
+    for goal in submitted:
+        rows = unmatched.get(_goal_key(goal))
+        if rows:
+            rows.pop()
+        else:
+            missing.append(goal)
+    surplus = sorted((row for rows in unmatched.values() for row in rows), key=lambda row: row.id)
+    updates = list(zip(surplus, missing))
+    return updates, missing[len(updates):], surplus[len(updates):]
+
+def update_match(db: Session, match_id: int, match: schemas.MatchCreate):
+    """Update a match's details and goals. Returns None if it doesn't exist.
+
+    Goals are diffed against the stored ones (diff_goals) so unchanged goals
+    keep their rows and ids; a one-goal correction is a single UPDATE.
+    """
+    db_match = db.get(models.Match, match_id)
+    if not db_match:
+        return None
+    existing = db.scalars(
+        select(models.Goal).options(load_only(*_GOAL_COLUMNS)).where(models.Goal.match_id == match_id)
+    ).all()
+    old_season, new_season = db_match.season_start_year, season_start_year(match.date)
+    old_goals = [_goal_key(g) for g in existing]
+    # Both the season the match was in and the one it moves to change.
+    stats.invalidate_season_snapshots(db, {old_season, new_season})
+
+    db_match.date = match.date
+    db_match.season_start_year = new_season
+    db_match.team_young_score = match.team_young_score
+    db_match.team_old_score = match.team_old_score
+
+    updates, inserts, deletes = diff_goals(existing, match.goals)
+    for row, goal in updates:
+        row.player_id, row.is_own_goal, row.team = goal.player_id, goal.is_own_goal, goal.team
+    db.add_all(
+        models.Goal(match_id=match_id, player_id=goal.player_id, is_own_goal=goal.is_own_goal, team=goal.team)
+        for goal in inserts
+    )
+    for row in deletes:
+        db.delete(row)
+
+    # The old and new contributions cancel out except where goals changed;
+    # apply_delta writes nothing when the net change is zero.
+    tallies.apply_delta(db, tallies.merge(
+        tallies.match_delta(old_season, old_goals, sign=-1),
+        tallies.match_delta(new_season, [_goal_key(g) for g in match.goals]),
+    ))
     db.commit()
     db.refresh(db_match)
     return db_match
@@ -88,8 +378,15 @@ def delete_match(db: Session, match_id: int):
     if not match:
         return None
     
+    goals = db.query(models.Goal.player_id, models.Goal.is_own_goal, models.Goal.team).filter(
+        models.Goal.match_id == match_id
+    ).all()
+    tallies.apply_delta(db, tallies.match_delta(match.season_start_year, goals, sign=-1))
+
     # Delete all goals associated with this match
     goals_deleted = db.query(models.Goal).filter(models.Goal.match_id == match_id).delete()
+
+    stats.invalidate_season_snapshots(db, [match.season_start_year])
     
     # Delete the match
     db.delete(match)
@@ -100,30 +397,49 @@ def delete_match(db: Session, match_id: int):
         "deleted_goals": goals_deleted
     }
 
-def export_database_to_sqlite(dest_path: str):
+# Tables that hold source data, in FK-safe insert order. Derived tables
+# (tallies, season snapshots) are rebuilt from these and not exported.
+BACKUP_TABLES = [
+    models.Player.__table__,
+    models.Match.__table__,
+    models.Goal.__table__,
+    models.PlayerVisibility.__table__,
+]
+
+# Rows per fetch/insert round when copying tables. Memory use of an export is
+# bounded by one batch, whatever the size of the match history.
+EXPORT_BATCH_SIZE = 1000
+
+def export_database_to_sqlite(dest_path: str, src_engine=None, batch_size: int = EXPORT_BATCH_SIZE,
+                              progress=None):
     """Write the current database's contents into a portable SQLite file.
 
     Used for downloadable backups. Works regardless of the live backend (e.g.
     Postgres in production) — it reads via the app's engine and writes a fresh
     SQLite file with the same schema, which can be re-imported with migrate_db.py.
+
+    Rows are streamed (a server-side cursor on Postgres) and written in
+    fixed-size executemany batches, so the whole database is never held in
+    memory at once.
+
+    `progress`, if given, is called as progress(table_name, rows) after each
+    batch is written (app/backup.py uses it to report job progress).
     """
     from sqlalchemy import create_engine, select, insert
-    from .database import engine as src_engine
+    if src_engine is None:
+        from .database import engine as src_engine
 
-    tables = [
-        models.Player.__table__,
-        models.Match.__table__,
-        models.Goal.__table__,
-        models.PlayerVisibility.__table__,
-    ]
     dst_engine = create_engine(f"sqlite:///{dest_path}")
     try:
         models.Base.metadata.create_all(bind=dst_engine)
         with src_engine.connect() as sconn, dst_engine.begin() as dconn:
-            for table in tables:
-                rows = [dict(r) for r in sconn.execute(select(table)).mappings().all()]
-                if rows:
-                    dconn.execute(insert(table), rows)
+            streaming = sconn.execution_options(stream_results=True, yield_per=batch_size)
+            for table in BACKUP_TABLES:
+                result = streaming.execute(select(table).order_by(table.c.id))
+                for batch in result.mappings().partitions():
+                    dconn.execute(insert(table), [dict(r) for r in batch])
+                    if progress is not None:
+                        progress(table.name, len(batch))
     finally:
         dst_engine.dispose()
 
@@ -131,6 +447,66 @@ def get_player_visibility(db: Session):
     """Return all per-season visibility overrides."""
     return db.query(models.PlayerVisibility).all()
 
+def resolved_visibility_statement(season_start_year: int):
+    """select() of (player_id, hidden) for every player in a season.
+
+    A window over player_visibility keeps each player's latest override at or
+    before the season (served by the uq_player_visibility_season index);
+    players without one are visible.
+    """
+    pv = models.PlayerVisibility
+    latest = (
+        select(
+            pv.player_id,
+            pv.hidden,
+            func.row_number().over(partition_by=pv.player_id, order_by=pv.season_start_year.desc()).label("rank"),
+        )
+        .where(pv.season_start_year <= season_start_year)
+        .subquery()
+    )
+    return (
+        select(models.Player.id, func.coalesce(latest.c.hidden, False).label("hidden"))
+        .outerjoin(latest, and_(latest.c.player_id == models.Player.id, latest.c.rank == 1))
+        .order_by(models.Player.id)
+    )
+
+def resolve_visibility(season_start_year: int, rows) -> dict:
+    """Response body for the resolved roster from (player_id, hidden) rows."""
+    resolved = {"season_start_year": season_start_year, "visible": [], "hidden": []}
+    for player_id, hidden in rows:
+        resolved["hidden" if hidden else "visible"].append(player_id)
+    return resolved
+
+def get_resolved_visibility(db: Session, season_start_year: int):
+    """Effective visible / hidden player ids for a season."""
+    return resolve_visibility(season_start_year, db.execute(resolved_visibility_statement(season_start_year)))
+
+def set_player_visibility_bulk(db: Session, overrides: List[schemas.PlayerVisibilityBase]):
+    """Upsert many visibility overrides in one statement.
+
+    Returns the number of overrides written, or None (nothing written) if
+    one of the players doesn't exist. A later entry for the same player and
+    season wins.
+    """
+    rows = {(o.player_id, o.season_start_year): o.hidden for o in overrides}
+    player_ids = {player_id for player_id, _ in rows}
+    if not rows:
+        return 0
+    found = set(db.scalars(select(models.Player.id).where(models.Player.id.in_(player_ids))))
+    if found != player_ids:
+        return None
+    table = models.PlayerVisibility.__table__
+    stmt = upsert_insert(db.get_bind(), table).values([
+        {"player_id": player_id, "season_start_year": season, "hidden": hidden}
+        for (player_id, season), hidden in rows.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.player_id, table.c.season_start_year],
+        set_={"hidden": stmt.excluded.hidden},
+    ))
+    db.commit()
+    return len(rows)
+
 def set_player_visibility(db: Session, player_id: int, season_start_year: int, hidden: bool):
     """Upsert a visibility override for a player in a specific season."""
     player = db.query(models.Player).filter(models.Player.id == player_id).first()
@@ -168,31 +544,58 @@ def clear_player_visibility(db: Session, player_id: int, season_start_year: int)
     db.commit()
     return True
 
+def unknown_player_goals_statement():
+    """select() of the unknown player's goals with their (shallow) match.
+
+    Matches the player by name, so unlike get_unknown_player_goals it never
+    creates the unknown player; usable in read-only transactions.
+    """
+    return (
+        select(models.Goal)
+        .join(models.Player, models.Goal.player_id == models.Player.id)
+        .where(models.Player.name == stats.UNKNOWN_PLAYER_NAME)
+        .options(
+            load_only(*_GOAL_COLUMNS),
+            joinedload(models.Goal.match).load_only(*_SHALLOW_MATCH_COLUMNS),
+            noload(models.Goal.player),
+        )
+        .order_by(models.Goal.id)
+    )
+
 def get_unknown_player_goals(db: Session):
     """Get all goals assigned to the unknown player."""
-    unknown_player = models.Player.get_unknown_player(db)
     return db.query(models.Goal).options(
         joinedload(models.Goal.match)
-    ).filter(models.Goal.player_id == unknown_player.id).all()
+    ).filter(models.Goal.player_id == models.Player.unknown_player_id(db)).all()
 
-def reassign_goals(db: Session, goal_ids: List[int], new_player_id: int):
-    """Reassign specific goals from unknown player to a real player."""
-    # Verify the new player exists
-    new_player = db.query(models.Player).filter(models.Player.id == new_player_id).first()
-    if not new_player:
+def reassign_goals_batch(db: Session, assignments: dict):
+    """Reassign goals from the unknown player to real players in one UPDATE.
+
+    `assignments` maps new player id -> goal ids. Goals that don't belong to
+    the unknown player are left alone. Returns the number of goals moved, or
+    None (and changes nothing) if one of the players doesn't exist.
+    """
+    player_ids = set(assignments)
+    found = set(db.scalars(select(models.Player.id).where(models.Player.id.in_(player_ids))))
+    if found != player_ids:
         return None
-    
-    # Get unknown player
-    unknown_player = models.Player.get_unknown_player(db)
-    
-    # Reassign the goals
-    goals = db.query(models.Goal).filter(
-        models.Goal.id.in_(goal_ids),
-        models.Goal.player_id == unknown_player.id
-    ).all()
-    
-    for goal in goals:
-        goal.player_id = new_player_id
-    
+    new_player_for = {goal_id: player_id for player_id, goal_ids in assignments.items() for goal_id in goal_ids}
+    if not new_player_for:
+        return 0
+
+    unknown_id = models.Player.unknown_player_id(db)
+    goal = models.Goal.__table__
+    moved = db.execute(
+        update(goal)
+        .where(goal.c.id.in_(list(new_player_for)), goal.c.player_id == unknown_id)
+        .values(player_id=case(new_player_for, value=goal.c.id))
+    ).rowcount
+    if moved:
+        stats.invalidate_season_snapshots(db)
+        tallies.recompute(db, [unknown_id, *player_ids])
     db.commit()
-    return len(goals) 
\ No newline at end of file
+    return moved
+
+def reassign_goals(db: Session, goal_ids: List[int], new_player_id: int):
+    """Reassign specific goals from unknown player to a real player."""
+    return reassign_goals_batch(db, {new_player_id: goal_ids})
@@ -0,0 +1,34 @@
+"""Default roster for seeding a fresh database (POST /players/defaults).
+
+Only needed once per database, so main.py imports it on demand.
+"""
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+
+DEFAULT_PLAYERS = [
+    {"name": "Adrian Huck", "birthdate": "2007-10-02"},
+    {"name": "Ferdi Forcher", "birthdate": "1995-03-21"},
+    {"name": "Johannes Boos", "birthdate": "2002-08-25"},
+    {"name": "Tom Altmann", "birthdate": "2007-01-12"},
+    {"name": "Linus Eberle", "birthdate": "2005-03-12"},
+    {"name": "Kaj Leimgruber", "birthdate": "2006-08-18"},
+    {"name": "Maximilian Gangloff", "birthdate": "1998-08-04"},
+    {"name": "Luka Misetic", "birthdate": "1998-03-29"},
+    {"name": "Maximilian Maier", "birthdate": "2007-12-08"},
+    {"name": "Tim Peter", "birthdate": "1998-03-11"},
+    {"name": "Stefan Schmitt", "birthdate": "1993-09-17"},
+    {"name": "Tim Schreck", "birthdate": "1997-02-03"},
+    {"name": "Salomon Böhm", "birthdate": "2007-08-30"},
+    {"name": "Johannes Höll", "birthdate": "1993-04-23"},
+    {"name": "Jan Keller", "birthdate": "1998-11-14"},
+    {"name": "Jacob Kölmel", "birthdate": "2005-10-28"},
+    {"name": "Jaron Siefritz", "birthdate": "2008-01-12"},
+    {"name": "Daniel Leppert", "birthdate": "1997-07-07"},
+]
+
+
+def add_default_players(db: Session):
+    """Add the default players that don't exist yet (matched by name)."""
+    players = [schemas.PlayerCreate.model_validate(p) for p in DEFAULT_PLAYERS]
+    return crud.upsert_players(db, players, update_existing=False)
@@ -0,0 +1,157 @@
+"""Live change events for PresentationMode and the match list.
+
+The mutating endpoints in main.py publish small events after their commit;
+clients follow them over Server-Sent Events (GET /events) or a WebSocket
+(/events/ws) and patch their local state instead of refetching everything.
+
+    match.created / match.updated   compact.py tables (players, matches, goals) of the one match
+    match.deleted                   {"id": 12}
+    matches.imported                {"ids": [...]}
+    matches.cleared                 {}
+    visibility.changed              {"overrides": [{"player_id", "season_start_year", "hidden"}]}
+                                    (hidden is null where an override was cleared)
+    players.changed                 {}  (roster or goal scorers changed: refetch players and matches)
+    resync                          {}  (events were missed: refetch everything, e.g. GET /bootstrap)
+
+A goal added to a running game arrives as match.updated with that match's
+full (small) goal table, which the client swaps in. Event ids start at the
+process start time in milliseconds, so they keep increasing across restarts
+and a client reconnecting to a restarted server is told to resync.
+
+The hub fans events out in-process: every subscriber is an asyncio queue
+drained by its own request coroutine, so idle subscribers cost no thread.
+Publishing is safe from any thread (the sync endpoints run in the
+threadpool). A subscriber that falls MAX_QUEUED events behind is sent a
+resync instead of blocking the publisher. The last HISTORY events are kept
+so a reconnecting client (Last-Event-ID) can catch up. With several server
+processes each has its own hub; start.sh runs a single one.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from . import compact
+
+HISTORY = 256
+MAX_QUEUED = 100
+# Comment line sent on idle SSE streams so proxies don't time them out.
+KEEPALIVE_SECONDS = 15
+
+
+class Event:
+    __slots__ = ("id", "type", "data")
+
+    def __init__(self, id: int, type: str, data: dict):
+        self.id, self.type, self.data = id, type, data
+
+    def payload(self) -> bytes:
+        return compact.dumps(self.data)
+
+    def sse(self) -> bytes:
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (self.id, self.type.encode(), self.payload())
+
+    def message(self) -> str:
+        """The event as one WebSocket text frame."""
+        return compact.dumps({"id": self.id, "type": self.type, "data": self.data}).decode()
+
+
+class Subscription:
+    """One client's queue of pending events; read it with `await get()`."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue = asyncio.Queue(MAX_QUEUED)
+
+    def put(self, event: Event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind to catch up event by event: start over.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(Event(event.id, "resync", {}))
+
+    async def get(self) -> Event:
+        return await self.queue.get()
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(time.time_ns() // 1_000_000)
+        self._history = deque(maxlen=HISTORY)
+        self._subscribers = set()
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        """Register a subscriber on the running event loop, first queueing
+        the events it missed after `last_event_id` (or a resync if they are
+        no longer in the history)."""
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+            missed = []
+            if last_event_id is not None:
+                newest = self._history[-1].id if self._history else 0
+                oldest = self._history[0].id if self._history else 1
+                seen = int(last_event_id) if last_event_id.isdigit() else -1
+                if oldest - 1 <= seen <= newest:
+                    missed = [e for e in self._history if e.id > seen]
+                else:
+                    missed = [Event(newest, "resync", {})]
+        for event in missed:
+            subscription.put(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, type: str, data: Optional[dict] = None) -> Event:
+        """Send an event to every subscriber. Callable from any thread."""
+        with self._lock:
+            event = Event(next(self._ids), type, data or {})
+            self._history.append(event)
+            by_loop = {}
+            for subscription in self._subscribers:
+                by_loop.setdefault(subscription.loop, []).append(subscription)
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for loop, subscriptions in by_loop.items():
+            if loop is current:
+                _deliver(subscriptions, event)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(_deliver, subscriptions, event)
+        return event
+
+
+def _deliver(subscriptions, event: Event):
+    for subscription in subscriptions:
+        subscription.put(event)
+
+
+hub = Hub()
+
+
+def publish(type: str, data: Optional[dict] = None) -> Event:
+    return hub.publish(type, data)
+
+
+def match_data(match) -> dict:
+    """Compact tables for one match (goals and their players loaded)."""
+    return compact.from_matches([match])
+
+
+def visibility_data(*overrides) -> dict:
+    return {"overrides": [
+        {"player_id": player_id, "season_start_year": season, "hidden": hidden}
+        for player_id, season, hidden in overrides
+    ]}
@@ -1,15 +1,20 @@
+import asyncio
 import os
-import shutil
-from fastapi import FastAPI, Depends, HTTPException, status, Header
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Query, Request, Response, WebSocket
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from . import schemas, crud, database
-from typing import List
+from . import schemas, crud, async_crud, database, stats, compact, cache, events
+from typing import List, Optional
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from . import models
-from datetime import datetime
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
+from datetime import date
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from functools import lru_cache
+from pydantic import BaseModel, TypeAdapter
+from starlette.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -28,7 +33,14 @@ if not ADMIN_PASSWORD:
 @asynccontextmanager
 async def lifespan(app):
     database.init_db()
+    await database.warm_up()
+    keep_warm = None
+    if database.DB_KEEP_WARM_SECONDS > 0:
+        keep_warm = asyncio.create_task(database.keep_warm(database.DB_KEEP_WARM_SECONDS))
     yield
+    if keep_warm is not None:
+        keep_warm.cancel()
+    await database.async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 app.add_middleware(
@@ -37,8 +49,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"],  # let the browser read the backup filename
+    # Let the browser read the backup filename and the keyset pagination cursor.
+    expose_headers=["Content-Disposition", "X-Next-Cursor", "ETag"],
 )
+# Compress JSON responses for spectators on mobile connections.
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 
 # Authentication dependencies
 def verify_global_password(password: str):
@@ -81,6 +96,11 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """Session for the async read handlers (see app/async_crud.py)."""
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
 
 class PasswordRequest(BaseModel):
     password: str
@@ -107,11 +127,57 @@ def create_player(player: schemas.PlayerCreate, db: Session = Depends(get_db), g
     result = crud.create_player(db=db, player=player)
     if result is None:
         raise HTTPException(status_code=400, detail="A player with this name already exists")
+    events.publish("players.changed")
     return result
 
+@lru_cache(maxsize=None)
+def _adapter(response_model):
+    return TypeAdapter(response_model)
+
+def render(data, response_model=None, headers=None) -> Response:
+    """Serialize a response body up front so app/cache.py can keep the bytes.
+
+    With a response_model the output is identical to what FastAPI would
+    produce from the route's declared model.
+    """
+    if response_model is None:
+        return JSONResponse(jsonable_encoder(data), headers=headers)
+    adapter = _adapter(response_model)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True), by_alias=True)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def paginated(request: Request, response_model, response_format: Optional[str], fetch, to_compact) -> Response:
+    """Run a keyset-paginated async_crud read, exposing the next page's cursor
+    in the X-Next-Cursor header (absent on the last page). Returns the compact
+    columnar representation when the client asked for it."""
+    try:
+        rows, next_cursor = await fetch()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if compact.wants_compact(request, response_format):
+        return compact.compact_response(request, to_compact(rows), headers=headers)
+    return render(rows, response_model, headers=headers)
+
 @app.get("/players/", response_model=List[schemas.Player])
-def read_players(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), global_auth: bool = Depends(get_global_auth)):
-    return crud.get_players(db, skip=skip, limit=limit)
+async def read_players(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    season: Optional[int] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    response_format: Optional[str] = Query(None, alias="format", pattern="^(json|compact)$"),
+    db: AsyncSession = Depends(get_async_db),
+    global_auth: bool = Depends(get_global_auth),
+):
+    """List players by name. Season / from / to restrict the embedded goals.
+    `format=compact` returns the normalized columnar form (see app/compact.py)."""
+    return await cache.cached_response_async(request, lambda: paginated(
+        request, List[schemas.Player], response_format,
+        lambda: async_crud.get_players(db, cursor=cursor, limit=limit, season=season, date_from=date_from, date_to=date_to),
+        compact.from_players,
+    ))
 
 @app.put("/players/{player_id}", response_model=schemas.Player)
 def update_player(player_id: int, player: schemas.PlayerCreate, db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
@@ -120,8 +186,11 @@ def update_player(player_id: int, player: schemas.PlayerCreate, db: Session = De
         raise HTTPException(status_code=404, detail="Player not found")
     db_player.name = player.name
     db_player.birthdate = player.birthdate
+    # Frozen season stats carry names and ages.
+    stats.invalidate_season_snapshots(db)
     db.commit()
     db.refresh(db_player)
+    events.publish("players.changed")
     return db_player
 
 @app.delete("/players/{player_id}")
@@ -136,48 +205,122 @@ def delete_player(player_id: int, db: Session = Depends(get_db), admin_auth: boo
             raise HTTPException(status_code=400, detail="Cannot delete the Unknown Player")
         else:
             raise HTTPException(status_code=404, detail="Player not found")
+    events.publish("players.changed")
+    return result
+
+@app.post("/players/bulk")
+async def upsert_players(
+    request: Request,
+    update_existing: bool = True,
+    db: Session = Depends(get_db),
+    admin_auth: bool = Depends(get_admin_auth),
+):
+    """Add a roster (JSON list of players, or CSV `name,birthdate` with
+    Content-Type text/csv) in one statement, matching existing players by name.
+
+    Existing players get the roster's birthdate unless `update_existing=false`.
+    Invalid rows reject the whole roster (422, errors per row).
+    """
+    from . import bulk_import
+
+    try:
+        rows = bulk_import.parse_players(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    players, errors = bulk_import.validate_players(rows)
+    if errors:
+        return JSONResponse(status_code=422, content={"detail": "Invalid rows; nothing was imported", "errors": errors})
+    result = await run_in_threadpool(crud.upsert_players, db, players, update_existing)
+    if result["added"] or result["updated"]:
+        events.publish("players.changed")
+    return result
+
+class PlayerDeletionRequest(BaseModel):
+    player_ids: List[int]
+
+@app.post("/players/batch-delete")
+def delete_players(request: PlayerDeletionRequest, db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
+    """Delete several players in one transaction, e.g. a roster cleanup at the
+    end of a season. Their goals go to the unknown player; ids that don't exist
+    (or are the unknown player) are listed under `skipped`."""
+    result = crud.delete_players(db, request.player_ids)
+    if result["deleted_players"]:
+        events.publish("players.changed")
     return result
 
 @app.delete("/players/", status_code=204)
 def delete_all_players(db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
+    db.query(models.PlayerSeasonTally).delete()
     db.query(models.Goal).delete()
     db.query(models.Player).delete()
+    stats.invalidate_season_snapshots(db)
     db.commit()
+    events.publish("resync")
     return
 
 @app.post("/matches/", response_model=schemas.Match)
 def create_match(match: schemas.MatchCreate, db: Session = Depends(get_db), global_auth: bool = Depends(get_global_auth)):
-    return crud.create_match(db=db, match=match)
+    db_match = crud.create_match(db=db, match=match)
+    events.publish("match.created", events.match_data(db_match))
+    return db_match
+
+@app.post("/matches/bulk", status_code=201)
+async def create_matches_bulk(request: Request, db: Session = Depends(get_db), global_auth: bool = Depends(get_global_auth)):
+    """Import many matches with their goals at once, e.g. a historical season.
+
+    The body is a JSON list of matches (as for POST /matches/) or, with
+    Content-Type text/csv, CSV in the format described in app/bulk_import.py.
+    All rows are validated first; if any is invalid nothing is imported and
+    the response (422) lists the errors per row. Otherwise everything is
+    inserted in a single transaction.
+    """
+    from . import bulk_import
+
+    try:
+        rows = bulk_import.parse_matches(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def run():
+        matches, errors = bulk_import.validate_matches(db, rows)
+        if errors:
+            return JSONResponse(status_code=422, content={"detail": "Invalid rows; nothing was imported", "errors": errors})
+        match_ids = crud.create_matches_bulk(db, matches)
+        events.publish("matches.imported", {"ids": match_ids})
+        return {"created": len(matches), "match_ids": match_ids}
+
+    return await run_in_threadpool(run)
 
 @app.get("/matches/", response_model=List[schemas.Match])
-def read_matches(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), global_auth: bool = Depends(get_global_auth)):
-    return crud.get_matches(db, skip=skip, limit=limit)
+async def read_matches(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    season: Optional[int] = None,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    player_id: Optional[int] = None,
+    response_format: Optional[str] = Query(None, alias="format", pattern="^(json|compact)$"),
+    db: AsyncSession = Depends(get_async_db),
+    global_auth: bool = Depends(get_global_auth),
+):
+    """List matches by date, optionally filtered by season, date range or scorer.
+    `format=compact` returns the normalized columnar form (see app/compact.py)."""
+    return await cache.cached_response_async(request, lambda: paginated(
+        request, List[schemas.Match], response_format,
+        lambda: async_crud.get_matches(
+            db, cursor=cursor, limit=limit, season=season, date_from=date_from, date_to=date_to,
+            player_id=player_id,
+        ),
+        compact.from_matches,
+    ))
 
 @app.put("/matches/{match_id}", response_model=schemas.Match)
 def update_match(match_id: int, match: schemas.MatchCreate, db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
-    db_match = crud.get_match(db, match_id)
+    db_match = crud.update_match(db, match_id, match)
     if not db_match:
         raise HTTPException(status_code=404, detail="Match not found")
-    
-    # Update match details
-    db_match.date = match.date
-    db_match.team_young_score = match.team_young_score
-    db_match.team_old_score = match.team_old_score
-    
-    # Delete existing goals and add new ones
-    db.query(models.Goal).filter(models.Goal.match_id == match_id).delete()
-    
-    for goal in match.goals:
-        db_goal = models.Goal(
-            match_id=match_id,
-            player_id=goal.player_id,
-            is_own_goal=goal.is_own_goal,
-            team=goal.team
-        )
-        db.add(db_goal)
-    
-    db.commit()
-    db.refresh(db_match)
+    events.publish("match.updated", events.match_data(db_match))
     return db_match
 
 @app.delete("/matches/{match_id}")
@@ -185,120 +328,177 @@ def delete_match(match_id: int, db: Session = Depends(get_db), admin_auth: bool
     result = crud.delete_match(db, match_id)
     if result is None:
         raise HTTPException(status_code=404, detail="Match not found")
+    events.publish("match.deleted", {"id": match_id})
     return result
 
 @app.delete("/matches/", status_code=204)
 def delete_all_matches(db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
+    db.query(models.PlayerSeasonTally).delete()
     db.query(models.Goal).delete()
     db.query(models.Match).delete()
+    stats.invalidate_season_snapshots(db)
     db.commit()
+    events.publish("matches.cleared")
     return
 
 @app.post("/players/defaults", status_code=201)
 def add_default_players(db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
-    default_players = [
-        {"name": "Adrian Huck", "birthdate": "2007-10-02"},
-        {"name": "Ferdi Forcher", "birthdate": "1995-03-21"},
-        {"name": "Johannes Boos", "birthdate": "2002-08-25"},
-        {"name": "Tom Altmann", "birthdate": "2007-01-12"},
-        {"name": "Linus Eberle", "birthdate": "2005-03-12"},
-        {"name": "Kaj Leimgruber", "birthdate": "2006-08-18"},
-        {"name": "Maximilian Gangloff", "birthdate": "1998-08-04"},
-        {"name": "Luka Misetic", "birthdate": "1998-03-29"},
-        {"name": "Maximilian Maier", "birthdate": "2007-12-08"},
-        {"name": "Tim Peter", "birthdate": "1998-03-11"},
-        {"name": "Stefan Schmitt", "birthdate": "1993-09-17"},
-        {"name": "Tim Schreck", "birthdate": "1997-02-03"},
-        {"name": "Salomon Böhm", "birthdate": "2007-08-30"},
-        {"name": "Johannes Höll", "birthdate": "1993-04-23"},
-        {"name": "Jan Keller", "birthdate": "1998-11-14"},
-        {"name": "Jacob Kölmel", "birthdate": "2005-10-28"},
-        {"name": "Jaron Siefritz", "birthdate": "2008-01-12"},
-        {"name": "Daniel Leppert", "birthdate": "1997-07-07"},
-    ]
-    
-    added_count = 0
-    skipped_count = 0
-    
-    for p in default_players:
-        # Check if player with this name already exists
-        existing_player = db.query(models.Player).filter(models.Player.name == p["name"]).first()
-        if existing_player:
-            skipped_count += 1
-            continue
-        
-        # Add new player
-        db_player = models.Player(
-            name=p["name"],
-            birthdate=datetime.strptime(p["birthdate"], "%Y-%m-%d").date()
+    from . import defaults
+
+    result = defaults.add_default_players(db)
+    if result["added"]:
+        events.publish("players.changed")
+    return result
+
+@app.post("/backup/jobs", status_code=status.HTTP_202_ACCEPTED)
+def start_backup_job(
+    kind: str = Query("full", pattern="^(full|incremental)$"),
+    admin_auth: bool = Depends(get_admin_auth),
+):
+    """Start a backup in the background (or join the one already running) and
+    return its job; poll GET /backup/jobs/{job_id} until it is done.
+
+    `kind=incremental` only stores the rows changed since the latest full backup.
+    """
+    from . import backup
+
+    return backup.start_backup(kind).to_dict()
+
+@app.get("/backup/jobs/{job_id}")
+def read_backup_job(job_id: str, admin_auth: bool = Depends(get_admin_auth)):
+    """Status and progress (tables / rows copied) of a backup job."""
+    from . import backup
+
+    job = backup.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backup job not found")
+    return job.to_dict()
+
+@app.get("/backup/jobs/{job_id}/download")
+def download_backup_job(job_id: str, full: bool = False, admin_auth: bool = Depends(get_admin_auth)):
+    """Download the file of a finished backup job.
+
+    With `full=true` an incremental backup is first merged with its base into
+    a complete snapshot.
+    """
+    from . import backup
+
+    job = backup.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Backup job not found")
+    if job.status == backup.FAILED:
+        raise HTTPException(status_code=500, detail=f"Backup failed: {job.error}")
+    if job.status != backup.DONE:
+        raise HTTPException(status_code=409, detail=f"Backup is still {job.status}")
+    if not os.path.exists(job.path):
+        # Deleted by the retention of a later backup.
+        raise HTTPException(status_code=410, detail="Backup file no longer exists")
+    if full and job.kind == backup.INCREMENTAL:
+        import tempfile
+        from starlette.background import BackgroundTask
+
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            backup.materialize(job.filename, path)
+        except (ValueError, FileNotFoundError):
+            os.remove(path)
+            raise HTTPException(status_code=410, detail="Backup file no longer exists")
+        return FileResponse(
+            path=path,
+            filename=job.filename.replace(".incremental.db", ".db"),
+            media_type="application/octet-stream",
+            background=BackgroundTask(os.remove, path),
         )
-        db.add(db_player)
-        added_count += 1
-    
-    db.commit()
-    return {
-        "added": added_count,
-        "skipped": skipped_count,
-        "total_requested": len(default_players)
-    } 
+    return FileResponse(path=job.path, filename=job.filename, media_type="application/octet-stream")
 
 @app.post("/backup/")
 def create_backup(admin_auth: bool = Depends(get_admin_auth)):
-    """Create a timestamped backup of the database and return it as a downloadable file."""
+    """Create a timestamped backup of the database and return it as a downloadable file.
+
+    Blocking convenience wrapper around the backup jobs: waits for the job
+    (shared with any concurrent request) and returns its file.
+    """
+    from . import backup
+
+    job = backup.start_backup()
+    job.wait()
+    if job.status != backup.DONE:
+        raise HTTPException(status_code=500, detail=f"Backup failed: {job.error}")
+    return FileResponse(path=job.path, filename=job.filename, media_type="application/octet-stream")
+
+@app.post("/restore/")
+async def restore_backup(request: Request, admin_auth: bool = Depends(get_admin_auth)):
+    """Replace all data with an uploaded backup file (the raw SQLite file as
+    the request body, as produced by POST /backup/).
+
+    The upload is streamed to a temporary file (written off the event loop,
+    at most restore.RESTORE_MAX_BYTES, else 413), validated, and loaded in a
+    single transaction: until it commits, reads keep seeing the old data, and
+    an invalid backup changes nothing.
+    """
+    import tempfile
+    from . import restore
+
+    too_large = HTTPException(status_code=413, detail="Backup file too large")
+    if int(request.headers.get("content-length") or 0) > restore.RESTORE_MAX_BYTES:
+        raise too_large
+    fd, path = tempfile.mkstemp(suffix=".db")
     try:
-        # Create backups directory if it doesn't exist
-        backup_dir = "backups"
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        # Generate timestamp for unique filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_filename = f"football_backup_{timestamp}.db"
-        backup_path = os.path.join(backup_dir, backup_filename)
-
-        # Export the live database (Postgres in production) into a portable
-        # SQLite snapshot that can be downloaded and re-imported.
-        crud.export_database_to_sqlite(backup_path)
-
-        # Return the file as a downloadable response
-        return FileResponse(
-            path=backup_path,
-            filename=backup_filename,
-            media_type="application/octet-stream"
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Backup failed: {str(e)}")
+        with os.fdopen(fd, "wb") as f:
+            size = 0
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > restore.RESTORE_MAX_BYTES:
+                    raise too_large
+                await run_in_threadpool(f.write, chunk)
+        counts = await run_in_threadpool(restore.restore_from_sqlite, path)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid backup: {e}")
+    finally:
+        os.remove(path)
+    events.publish("resync")
+    return {"restored": counts}
 
 @app.get("/backups/")
 def list_backups(global_auth: bool = Depends(get_global_auth)):
-    """List all available backup files."""
+    """List all available backups, newest first (read from the backup index)."""
+    from . import backup
+
     try:
-        backup_dir = "backups"
-        if not os.path.exists(backup_dir):
-            return {"backups": []}
-        
-        backups = []
-        for filename in os.listdir(backup_dir):
-            if filename.endswith(".db") and filename.startswith("football_backup_"):
-                file_path = os.path.join(backup_dir, filename)
-                file_stats = os.stat(file_path)
-                backups.append({
-                    "filename": filename,
-                    "size_bytes": file_stats.st_size,
-                    "created": datetime.fromtimestamp(file_stats.st_ctime).isoformat(),
-                    "modified": datetime.fromtimestamp(file_stats.st_mtime).isoformat()
-                })
-        
-        # Sort by creation time (newest first)
-        backups.sort(key=lambda x: x["created"], reverse=True)
-        return {"backups": backups}
+        return {"backups": [
+            {**{k: v for k, v in entry.items() if k != "tables"}, "modified": entry["created"]}
+            for entry in backup.load_index()
+        ]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list backups: {str(e)}")
 
 # Player visibility (per-season) endpoints
 @app.get("/player-visibility/", response_model=List[schemas.PlayerVisibility])
-def read_player_visibility(db: Session = Depends(get_db), global_auth: bool = Depends(get_global_auth)):
+async def read_player_visibility(request: Request, db: AsyncSession = Depends(get_async_db), global_auth: bool = Depends(get_global_auth)):
     """List all per-season player visibility overrides."""
-    return crud.get_player_visibility(db)
+    async def build():
+        return render(await async_crud.get_player_visibility(db), List[schemas.PlayerVisibility])
+    return await cache.cached_response_async(request, build)
+
+@app.get("/player-visibility/resolved", response_model=schemas.ResolvedVisibility)
+async def read_resolved_visibility(request: Request, season: int, db: AsyncSession = Depends(get_async_db), global_auth: bool = Depends(get_global_auth)):
+    """Ids of the visible and hidden players in a season, with the overrides
+    inherited from earlier seasons already applied."""
+    async def build():
+        return render(await async_crud.get_resolved_visibility(db, season), schemas.ResolvedVisibility)
+    return await cache.cached_response_async(request, build)
+
+@app.put("/player-visibility/bulk")
+def set_player_visibility_bulk(payload: List[schemas.PlayerVisibilityBase], db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
+    """Set (upsert) many per-season visibility overrides at once."""
+    result = crud.set_player_visibility_bulk(db, payload)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    events.publish("visibility.changed", events.visibility_data(
+        *((o.player_id, o.season_start_year, o.hidden) for o in payload)
+    ))
+    return {"upserted": result}
 
 @app.put("/player-visibility/", response_model=schemas.PlayerVisibility)
 def set_player_visibility(payload: schemas.PlayerVisibilityBase, db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
@@ -306,6 +506,9 @@ def set_player_visibility(payload: schemas.PlayerVisibilityBase, db: Session = D
     result = crud.set_player_visibility(db, payload.player_id, payload.season_start_year, payload.hidden)
     if result is None:
         raise HTTPException(status_code=404, detail="Player not found")
+    events.publish("visibility.changed", events.visibility_data(
+        (payload.player_id, payload.season_start_year, payload.hidden)
+    ))
     return result
 
 @app.delete("/player-visibility/{player_id}/{season_start_year}")
@@ -314,14 +517,82 @@ def clear_player_visibility(player_id: int, season_start_year: int, db: Session
     result = crud.clear_player_visibility(db, player_id, season_start_year)
     if result is None:
         raise HTTPException(status_code=404, detail="No override found for this player and season")
+    events.publish("visibility.changed", events.visibility_data((player_id, season_start_year, None)))
     return {"cleared": True}
 
+@app.get("/bootstrap", response_model=schemas.Bootstrap)
+async def read_bootstrap(request: Request, season: Optional[int] = None, db: AsyncSession = Depends(get_async_db), global_auth: bool = Depends(get_global_auth)):
+    """Data for the initial view (players, matches, visibility overrides,
+    unknown-player goals) in one response with one ETag, read from a single
+    consistent snapshot. `season` filters the matches and the players' goals."""
+    async def build():
+        return render(await async_crud.get_bootstrap(db, season), schemas.Bootstrap)
+    return await cache.cached_response_async(request, build)
+
+# Live updates (see app/events.py)
+@app.get("/events")
+async def stream_events(last_event_id: Optional[str] = Header(None), global_auth: bool = Depends(get_global_auth)):
+    """Server-Sent Events stream of data changes. Browsers can't send the
+    password header with EventSource, so read it with fetch() instead."""
+    async def stream():
+        # Subscribed once the response starts streaming, so a client that
+        # disconnects before then leaves no subscription behind.
+        subscription = events.hub.subscribe(last_event_id)
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), events.KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield event.sse()
+        finally:
+            events.hub.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.websocket("/events/ws")
+async def events_websocket(websocket: WebSocket):
+    """The /events stream over a WebSocket, one JSON message per event.
+
+    Browsers can't set headers on a WebSocket either, so the first message
+    must be {"password": ..., "last_event_id": ... (optional)}.
+    """
+    await websocket.accept()
+    try:
+        hello = await asyncio.wait_for(websocket.receive_json(), 10)
+    except (asyncio.TimeoutError, ValueError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not isinstance(hello, dict) or hello.get("password") != GLOBAL_PASSWORD:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Incorrect global password")
+        return
+    last_event_id = hello.get("last_event_id")
+    subscription = events.hub.subscribe(None if last_event_id is None else str(last_event_id))
+
+    async def forward():
+        while True:
+            await websocket.send_text((await subscription.get()).message())
+
+    sender = asyncio.create_task(forward())
+    try:
+        # Clients don't send anything else; this only notices the disconnect.
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sender.cancel()
+        events.hub.unsubscribe(subscription)
+        # Wait for the sender to stop and collect its outcome: its cancellation,
+        # or a send that failed because the client had already left.
+        await asyncio.gather(sender, return_exceptions=True)
+
 # Unknown player management endpoints
 @app.get("/unknown-player/goals")
-def get_unknown_player_goals(db: Session = Depends(get_db), global_auth: bool = Depends(get_global_auth)):
+def get_unknown_player_goals(request: Request, db: Session = Depends(get_db), global_auth: bool = Depends(get_global_auth)):
     """Get all goals assigned to the unknown player."""
-    goals = crud.get_unknown_player_goals(db)
-    return goals
+    return cache.cached_response(request, lambda: render(crud.get_unknown_player_goals(db)))
 
 class GoalReassignmentRequest(BaseModel):
     goal_ids: List[int]
@@ -333,4 +604,69 @@ def reassign_goals(request: GoalReassignmentRequest, db: Session = Depends(get_d
     result = crud.reassign_goals(db, request.goal_ids, request.new_player_id)
     if result is None:
         raise HTTPException(status_code=404, detail="Player not found or invalid goal IDs")
-    return {"reassigned_goals": result} 
\ No newline at end of file
+    if result:
+        events.publish("players.changed")
+    return {"reassigned_goals": result}
+
+class GoalReassignmentBatchRequest(BaseModel):
+    assignments: List[GoalReassignmentRequest]
+
+@app.post("/unknown-player/reassign/batch")
+def reassign_goals_batch(request: GoalReassignmentBatchRequest, db: Session = Depends(get_db), admin_auth: bool = Depends(get_admin_auth)):
+    """Reassign goals from the unknown player to several players at once."""
+    assignments = {}
+    for assignment in request.assignments:
+        assignments.setdefault(assignment.new_player_id, []).extend(assignment.goal_ids)
+    result = crud.reassign_goals_batch(db, assignments)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Player not found")
+    if result:
+        events.publish("players.changed")
+    return {"reassigned_goals": result}
+
+# Season stats endpoints
+@app.get("/seasons/", response_model=List[int])
+async def read_seasons(request: Request, db: AsyncSession = Depends(get_async_db), global_auth: bool = Depends(get_global_auth)):
+    """Season start years that have at least one match, newest first."""
+    async def build():
+        return render(await async_crud.get_seasons(db), List[int])
+    return await cache.cached_response_async(request, build)
+
+@app.get("/stats/", response_model=schemas.SeasonStats)
+async def read_all_time_stats(request: Request, db: AsyncSession = Depends(get_async_db), global_auth: bool = Depends(get_global_auth)):
+    """Stats page payload across all seasons."""
+    async def build():
+        return render(await db.run_sync(stats.get_season_stats, None), schemas.SeasonStats)
+    return await cache.cached_response_async(request, build)
+
+@app.get("/stats/{season_start_year}", response_model=schemas.SeasonStats)
+async def read_season_stats(season_start_year: int, request: Request, db: AsyncSession = Depends(get_async_db), global_auth: bool = Depends(get_global_auth)):
+    """Stats page payload (leaderboard, podium, race, ...) for one season.
+
+    Finished seasons are served from their frozen snapshot (revalidated
+    against its ETag); the ongoing season goes through the versioned cache.
+    """
+    snapshot = await db.run_sync(stats.get_season_snapshot, season_start_year)
+    if snapshot is not None:
+        return cache.conditional_response(
+            request, snapshot.payload.encode(), snapshot.etag, cache.CACHE_CONTROL,
+        )
+    async def build():
+        return render(await db.run_sync(stats.get_season_stats, season_start_year), schemas.SeasonStats)
+    return await cache.cached_response_async(request, build)
+
+@app.get("/stats/{season_start_year}/race", response_model=schemas.RaceDeltas)
+async def read_season_race(
+    season_start_year: int,
+    request: Request,
+    keyframe_every: Optional[int] = Query(None, ge=1),
+    db: AsyncSession = Depends(get_async_db),
+    global_auth: bool = Depends(get_global_auth),
+):
+    """Goal race for one season as per-match deltas, with optional keyframes
+    (cumulative standings) every `keyframe_every` matches."""
+    async def build():
+        return render(
+            await db.run_sync(stats.get_season_race, season_start_year, keyframe_every), schemas.RaceDeltas
+        )
+    return await cache.cached_response_async(request, build)
@@ -1,8 +1,15 @@
-from sqlalchemy import Column, Integer, String, Date, Boolean, ForeignKey, UniqueConstraint
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, Text, ForeignKey, UniqueConstraint, Index, event
+from sqlalchemy.orm import Session, relationship, declarative_base
 
 Base = declarative_base()
 
+# Database URL -> id of the unknown player (see Player.unknown_player_id).
+_unknown_player_ids = {}
+
+def forget_unknown_player():
+    """Drop the cached unknown player id, e.g. after the players table was replaced."""
+    _unknown_player_ids.clear()
+
 class Player(Base):
     __tablename__ = "players"
     id = Column(Integer, primary_key=True, index=True)
@@ -30,14 +37,38 @@ class Player(Base):
             db.refresh(unknown_player)
         return unknown_player
 
+    @classmethod
+    def unknown_player_id(cls, db):
+        """Id of the unknown player, looked up (or created) once per database.
+
+        The player is never deleted through the API, so the id is cached;
+        bulk deletes of players (and restores) drop the cache.
+        """
+        key = str(db.get_bind().url)
+        if key not in _unknown_player_ids:
+            _unknown_player_ids[key] = cls.get_unknown_player(db).id
+        return _unknown_player_ids[key]
+
+@event.listens_for(Session, "do_orm_execute")
+def _forget_unknown_player_on_delete(state):
+    if state.is_delete and state.bind_mapper is not None and state.bind_mapper.class_ is Player:
+        forget_unknown_player()
+
 class Match(Base):
     __tablename__ = "matches"
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date)
+    # Denormalized from `date` (see app/season.py) so season filters are index
+    # range scans. Set by crud.create_match / crud.update_match.
+    season_start_year = Column(Integer)
     team_young_score = Column(Integer)
     team_old_score = Column(Integer)
     goals = relationship("Goal", back_populates="match")
 
+    __table_args__ = (
+        Index('ix_matches_season_date', 'season_start_year', 'date'),
+    )
+
 class Goal(Base):
     __tablename__ = "goals"
     id = Column(Integer, primary_key=True, index=True)
@@ -48,6 +79,11 @@ class Goal(Base):
     match = relationship("Match", back_populates="goals")
     player = relationship("Player", back_populates="goals")
 
+    __table_args__ = (
+        Index('ix_goals_match_id', 'match_id'),
+        Index('ix_goals_player_match', 'player_id', 'match_id'),
+    )
+
 class PlayerVisibility(Base):
     """Per-season override for whether a player is hidden from the roster UI.
 
@@ -64,4 +100,40 @@ class PlayerVisibility(Base):
 
     __table_args__ = (
         UniqueConstraint('player_id', 'season_start_year', name='uq_player_visibility_season'),
-    )
\ No newline at end of file
+    )
+
+class PlayerSeasonTally(Base):
+    """Per-player, per-season goal tallies, maintained incrementally.
+
+    Derived from `goals`: every write path that adds, removes or reassigns
+    goals adjusts these rows in the same transaction (see app/tallies.py), so
+    leaderboards read O(players) rows instead of counting every goal. Rebuild
+    or verify against the raw goals with `python rebuild_tallies.py`.
+    """
+    __tablename__ = "player_season_stats"
+    player_id = Column(Integer, ForeignKey("players.id"), primary_key=True)
+    season_start_year = Column(Integer, primary_key=True)
+    goals = Column(Integer, nullable=False, default=0)  # excluding own goals
+    own_goals = Column(Integer, nullable=False, default=0)
+    goals_for_old = Column(Integer, nullable=False, default=0)
+    goals_for_young = Column(Integer, nullable=False, default=0)
+    matches_scored_in = Column(Integer, nullable=False, default=0)
+
+class SeasonSnapshot(Base):
+    """Frozen Stats page payload (schemas.SeasonStats JSON) of a finished season.
+
+    Derived data: built on first request, deleted when a match in that season
+    (or the roster it names) changes, and never included in backups.
+    """
+    __tablename__ = "season_snapshots"
+    season_start_year = Column(Integer, primary_key=True)
+    payload = Column(Text, nullable=False)
+    etag = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class SchemaVersion(Base):
+    """Single row recording which database.SCHEMA_VERSION the schema was last
+    brought up to, so startup can skip create_all / upgrade_schema."""
+    __tablename__ = "schema_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
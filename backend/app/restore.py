@@ -0,0 +1,101 @@
+"""Restore the live database from an uploaded backup file.
+
+The counterpart of the backup export (crud.export_database_to_sqlite): the
+SQLite file is validated, then its rows replace the live data in a single
+transaction. Other connections keep reading the old data until that
+transaction commits (Postgres MVCC); a backup that fails to load leaves the
+live data untouched. The derived tables are rebuilt in the same transaction
+and the read cache is bumped on commit.
+"""
+import os
+
+from sqlalchemy import create_engine, delete, inspect, select
+from sqlalchemy.orm import Session
+
+from . import crud, models, tallies
+from .database import bulk_insert, reset_sequences
+from .season import season_start_year
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+# Largest upload POST /restore/ accepts (default 100 MB); larger ones get 413.
+RESTORE_MAX_BYTES = int(os.getenv("RESTORE_MAX_BYTES", str(100 * 1024 * 1024)))
+# Columns a backup may lack because they were added after it was taken;
+# they are filled in while loading.
+OPTIONAL_COLUMNS = {"matches": {"season_start_year"}}
+
+
+def validate_backup(path: str) -> dict:
+    """Check that `path` is a full backup with the app's schema.
+
+    Returns {table name: [column names to copy]}; raises ValueError with a
+    readable message otherwise.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(SQLITE_HEADER)) != SQLITE_HEADER:
+            raise ValueError("Not a SQLite database file")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        inspector = inspect(engine)
+        tables = set(inspector.get_table_names())
+        if "backup_deletions" in tables:
+            raise ValueError("This is an incremental backup; download it with ?full=true to restore it")
+        columns = {}
+        for table in crud.BACKUP_TABLES:
+            if table.name not in tables:
+                raise ValueError(f"Backup is missing the {table.name} table")
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            missing = set(table.c.keys()) - present - OPTIONAL_COLUMNS.get(table.name, set())
+            if missing:
+                raise ValueError(f"Backup table {table.name} is missing columns: {', '.join(sorted(missing))}")
+            columns[table.name] = [c.name for c in table.c if c.name in present]
+        return columns
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Unreadable backup: {e}")
+    finally:
+        engine.dispose()
+
+
+def restore_from_sqlite(path: str, dst_engine=None, batch_size: int = crud.EXPORT_BATCH_SIZE) -> dict:
+    """Replace the live data with the backup at `path`. Returns rows loaded per table."""
+    if dst_engine is None:
+        from .database import engine as dst_engine
+
+    columns = validate_backup(path)
+    src_engine = create_engine(f"sqlite:///{path}")
+    counts = {}
+    try:
+        with src_engine.connect() as sconn, Session(bind=dst_engine) as db:
+            conn = db.connection()
+            for model in (models.SeasonSnapshot, models.PlayerSeasonTally):
+                conn.execute(delete(model.__table__))
+            for table in reversed(crud.BACKUP_TABLES):
+                conn.execute(delete(table))
+
+            for table in crud.BACKUP_TABLES:
+                names = columns[table.name]
+                target = list(names)
+                backfill_season = table is models.Match.__table__ and "season_start_year" not in names
+                if backfill_season:
+                    target.append("season_start_year")
+                counts[table.name] = 0
+                result = sconn.execution_options(yield_per=batch_size).execute(
+                    select(*(table.c[name] for name in names)).order_by(table.c.id)
+                )
+                for batch in result.partitions():
+                    rows = [tuple(r) for r in batch]
+                    if backfill_season:
+                        day = names.index("date")
+                        rows = [(*r, season_start_year(r[day]) if r[day] else None) for r in rows]
+                    bulk_insert(conn, table, target, rows)
+                    counts[table.name] += len(rows)
+
+            reset_sequences(conn, crud.BACKUP_TABLES)
+            tallies.rebuild(conn)
+            db.commit()
+        # The unknown player may have a different id in the backup.
+        models.forget_unknown_player()
+    finally:
+        src_engine.dispose()
+    return counts
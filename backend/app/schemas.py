@@ -1,5 +1,6 @@
-from typing import Optional, List, TYPE_CHECKING
+from typing import Optional, List, Dict, TYPE_CHECKING
 from pydantic import BaseModel, ConfigDict
+from pydantic.alias_generators import to_camel
 from datetime import date
 
 class ShallowMatch(BaseModel):
@@ -50,6 +51,12 @@ class PlayerVisibility(PlayerVisibilityBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
+class ResolvedVisibility(BaseModel):
+    """Effective visibility of every player in one season."""
+    season_start_year: int
+    visible: List[int]
+    hidden: List[int]
+
 class MatchBase(BaseModel):
     date: date
     team_young_score: int
@@ -63,6 +70,82 @@ class Match(MatchBase):
     goals: List[Goal] = []
     model_config = ConfigDict(from_attributes=True)
 
+class Bootstrap(BaseModel):
+    """Everything the initial view needs, read from one snapshot (GET /bootstrap)."""
+    players: List[Player]
+    matches: List[Match]
+    visibility: List[PlayerVisibility]
+    unknown_player_goals: List[Goal]
+
+# Season stats. Field names are snake_case in Python but camelCase on the wire,
+# matching what the Stats page components consume.
+class StatsModel(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+class PlayerSeasonStats(StatsModel):
+    id: int
+    name: str
+    birthdate: Optional[date] = None
+    age: Optional[float] = None
+    goals: int = 0
+    own_goals: int = 0
+    team: Optional[str] = None  # team the player mostly scored for
+
+class TeamSummary(StatsModel):
+    old_goals: int = 0
+    young_goals: int = 0
+    old_wins: int = 0
+    young_wins: int = 0
+    draws: int = 0
+
+class BiggestWin(StatsModel):
+    date: date
+    diff: int
+    winner: str
+    score: str
+
+class RacePlayer(StatsModel):
+    id: int
+    name: str
+
+class RaceFrame(StatsModel):
+    date: date
+    cumulative: Dict[int, int]  # player id -> goals so far (scorers only)
+
+class Race(StatsModel):
+    players: List[RacePlayer] = []
+    frames: List[RaceFrame] = []
+    match_count: int = 0
+
+class RaceDeltaFrame(StatsModel):
+    date: date
+    match_id: int
+    deltas: Dict[int, int] = {}  # player id -> goals scored in this match
+
+class RaceDeltas(StatsModel):
+    """Goal race as per-match deltas. Cumulative standings after frame i are
+    the sum of deltas[0..i]; `keyframes` holds them precomputed every
+    `keyframe_every` frames (keyed by frame index) so clients can seek."""
+    season_start_year: int
+    players: List[RacePlayer] = []
+    frames: List[RaceDeltaFrame] = []
+    keyframe_every: Optional[int] = None
+    keyframes: Dict[int, Dict[int, int]] = {}
+    match_count: int = 0
+
+class SeasonStats(StatsModel):
+    season_start_year: Optional[int] = None  # None = all time
+    race: Race
+    match_count: int
+    player_stats: List[PlayerSeasonStats]
+    leaderboard: List[PlayerSeasonStats]
+    podium: List[PlayerSeasonStats]
+    own_goal_leader: Optional[PlayerSeasonStats] = None
+    summary: TeamSummary
+    total_goals: int
+    biggest_win: Optional[BiggestWin] = None
+    scatter: List[PlayerSeasonStats]
+
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     Match = Match  # for type hinting
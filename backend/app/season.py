@@ -0,0 +1,36 @@
+"""Season handling (mirrors frontend/src/utils/season.js).
+
+A season runs from mid-June to mid-June. A match played on/after the cutoff
+belongs to the season that starts that calendar year; a match before the
+cutoff belongs to the season that started the previous year. Keep the cutoff
+in sync with SEASON_CUTOFF_MONTH / SEASON_CUTOFF_DAY in the frontend.
+"""
+from datetime import date
+from typing import Optional, Tuple
+
+SEASON_CUTOFF_MONTH = 6  # June
+SEASON_CUTOFF_DAY = 15  # mid-June
+
+
+def season_start_year(d: date) -> int:
+    """Start year of the season a date belongs to, e.g. 2026-03-01 -> 2025."""
+    after_cutoff = (d.month, d.day) >= (SEASON_CUTOFF_MONTH, SEASON_CUTOFF_DAY)
+    return d.year if after_cutoff else d.year - 1
+
+
+def season_bounds(start_year: int) -> Tuple[date, date]:
+    """Half-open [first_day, first_day_of_next_season) date range of a season."""
+    return (
+        date(start_year, SEASON_CUTOFF_MONTH, SEASON_CUTOFF_DAY),
+        date(start_year + 1, SEASON_CUTOFF_MONTH, SEASON_CUTOFF_DAY),
+    )
+
+
+def ongoing_season(latest_season_with_games: Optional[int], today: Optional[date] = None) -> int:
+    """The not-yet-finished season: the later of the season `today` falls into
+    and the newest season that already has a game. Everything before it is over.
+    """
+    by_date = season_start_year(today or date.today())
+    if latest_season_with_games is None:
+        return by_date
+    return max(by_date, latest_season_with_games)
@@ -0,0 +1,279 @@
+"""Season statistics for the Stats page and presentation mode.
+
+Per-player totals come from the incrementally maintained player_season_stats
+tallies, per-match goal counts from a GROUP BY over goals joined with matches;
+everything is then assembled in a single pass over the season's matches, so the
+cost is linear in the number of goals rather than scorers x matches x goals.
+"""
+import hashlib
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import Session
+
+from . import cache, models, schemas
+from .database import upsert_insert
+from .season import ongoing_season, season_bounds
+
+UNKNOWN_PLAYER_NAME = "Unknown Player (Deleted)"
+
+
+def _age_in_years(birthdate: Optional[date], today: date) -> Optional[float]:
+    """Exact (fractional) age in years, or None if unknown / in the future."""
+    if birthdate is None or birthdate > today:
+        return None
+    return (today - birthdate).days / 365.25
+
+
+def _dominant_team(old: int, young: int) -> Optional[str]:
+    """Which team a player mostly scored for (ties go to 'old')."""
+    if old == 0 and young == 0:
+        return None
+    return "old" if old >= young else "young"
+
+
+def _in_season(query, season: Optional[int]):
+    """Restrict a query that involves Match to one season (None = all time)."""
+    if season is None:
+        return query
+    return query.filter(models.Match.season_start_year == season)
+
+
+# Season start years that have at least one match, newest first.
+SEASONS_STATEMENT = (
+    select(models.Match.season_start_year)
+    .where(models.Match.season_start_year.is_not(None))
+    .distinct()
+    .order_by(models.Match.season_start_year.desc())
+)
+
+
+def get_seasons(db: Session):
+    """Season start years that have at least one match, newest first."""
+    return list(db.scalars(SEASONS_STATEMENT))
+
+
+def get_season_stats(
+    db: Session, season: Optional[int] = None, as_of: Optional[date] = None
+) -> schemas.SeasonStats:
+    """Compute the full stats payload for one season (None = all time).
+
+    Ages are taken at `as_of` (default: today).
+    """
+    today = as_of or date.today()
+
+    matches = _in_season(
+        db.query(
+            models.Match.id,
+            models.Match.date,
+            models.Match.team_young_score,
+            models.Match.team_old_score,
+        ),
+        season,
+    ).order_by(models.Match.date, models.Match.id).all()
+
+    # Per-player tallies, maintained incrementally in player_season_stats
+    # (one row per player and season, so this is O(players)).
+    tally = models.PlayerSeasonTally
+    tally_query = db.query(
+        tally.player_id,
+        func.sum(tally.goals),
+        func.sum(tally.own_goals),
+        func.sum(tally.goals_for_old),
+        func.sum(tally.goals_for_young),
+    )
+    if season is not None:
+        tally_query = tally_query.filter(tally.season_start_year == season)
+    tallies = {
+        player_id: {"goals": goals, "own_goals": own_goals, "old": old, "young": young}
+        for player_id, goals, own_goals, old, young in tally_query.group_by(tally.player_id)
+    }
+
+    # Real players only — skip the "Unknown Player".
+    player_stats = []
+    for p in db.query(models.Player.id, models.Player.name, models.Player.birthdate).filter(
+        models.Player.name != UNKNOWN_PLAYER_NAME
+    ).order_by(models.Player.id):
+        t = tallies.get(p.id, {"goals": 0, "own_goals": 0, "old": 0, "young": 0})
+        player_stats.append(schemas.PlayerSeasonStats(
+            id=p.id,
+            name=p.name,
+            birthdate=p.birthdate,
+            age=_age_in_years(p.birthdate, today),
+            goals=t["goals"],
+            own_goals=t["own_goals"],
+            team=_dominant_team(t["old"], t["young"]),
+        ))
+
+    leaderboard = sorted(
+        (s for s in player_stats if s.goals > 0), key=lambda s: (-s.goals, s.name)
+    )
+    own_goal_leader = min(
+        (s for s in player_stats if s.own_goals > 0),
+        key=lambda s: (-s.own_goals, s.name),
+        default=None,
+    )
+    scatter = [s for s in player_stats if s.goals > 0 and s.age is not None]
+
+    # Goal race: non-own goals per (match, scorer), replayed in match order.
+    scorer_ids = {s.id for s in leaderboard}
+    scored_in = defaultdict(list)
+    race_rows = _in_season(
+        db.query(models.Goal.match_id, models.Goal.player_id, func.count(models.Goal.id))
+        .join(models.Match, models.Goal.match_id == models.Match.id)
+        .filter(models.Goal.is_own_goal.is_(False)),
+        season,
+    ).group_by(models.Goal.match_id, models.Goal.player_id).all()
+    for match_id, player_id, count in race_rows:
+        if player_id in scorer_ids:
+            scored_in[match_id].append((player_id, count))
+
+    # Single pass over the ordered matches: summary, biggest win and race frames.
+    summary = schemas.TeamSummary()
+    biggest_win = None
+    running = {}
+    frames = []
+    for m in matches:
+        summary.old_goals += m.team_old_score
+        summary.young_goals += m.team_young_score
+        if m.team_old_score > m.team_young_score:
+            summary.old_wins += 1
+        elif m.team_young_score > m.team_old_score:
+            summary.young_wins += 1
+        else:
+            summary.draws += 1
+
+        diff = abs(m.team_old_score - m.team_young_score)
+        if diff > 0 and (biggest_win is None or diff > biggest_win.diff):
+            biggest_win = schemas.BiggestWin(
+                date=m.date,
+                diff=diff,
+                winner="Team Old" if m.team_old_score > m.team_young_score else "Team Young",
+                score=f"{m.team_old_score}:{m.team_young_score}",
+            )
+
+        for player_id, count in scored_in.get(m.id, ()):
+            running[player_id] = running.get(player_id, 0) + count
+        frames.append(schemas.RaceFrame(date=m.date, cumulative=dict(running)))
+
+    return schemas.SeasonStats(
+        season_start_year=season,
+        race=schemas.Race(
+            players=[schemas.RacePlayer(id=s.id, name=s.name) for s in player_stats if s.id in scorer_ids],
+            frames=frames,
+            match_count=len(matches),
+        ),
+        match_count=len(matches),
+        player_stats=player_stats,
+        leaderboard=leaderboard,
+        podium=leaderboard[:3],
+        own_goal_leader=own_goal_leader,
+        summary=summary,
+        total_goals=summary.old_goals + summary.young_goals,
+        biggest_win=biggest_win,
+        scatter=scatter,
+    )
+
+
+def get_season_race(db: Session, season: int, keyframe_every: Optional[int] = None) -> schemas.RaceDeltas:
+    """Goal race of a season as per-match deltas (see schemas.RaceDeltas).
+
+    One ordered pass over the season's matches outer-joined with their non-own
+    goals, so the payload and the work are linear in matches + goals.
+    """
+    rows = db.query(models.Match.id, models.Match.date, models.Goal.player_id).outerjoin(
+        models.Goal,
+        and_(models.Goal.match_id == models.Match.id, models.Goal.is_own_goal.is_(False)),
+    ).filter(models.Match.season_start_year == season).order_by(
+        models.Match.date, models.Match.id
+    ).all()
+
+    scorer_ids = {player_id for _, _, player_id in rows if player_id is not None}
+    players = db.query(models.Player.id, models.Player.name).filter(
+        models.Player.id.in_(scorer_ids), models.Player.name != UNKNOWN_PLAYER_NAME
+    ).order_by(models.Player.id).all() if scorer_ids else []
+    real_ids = {p.id for p in players}
+
+    frames = []
+    keyframes = {}
+    running = {}
+    for match_id, match_date, player_id in rows:
+        if not frames or frames[-1].match_id != match_id:
+            if keyframe_every and frames and len(frames) % keyframe_every == 0:
+                keyframes[len(frames) - 1] = dict(running)
+            frames.append(schemas.RaceDeltaFrame(date=match_date, match_id=match_id))
+        if player_id in real_ids:
+            deltas = frames[-1].deltas
+            deltas[player_id] = deltas.get(player_id, 0) + 1
+            running[player_id] = running.get(player_id, 0) + 1
+    if keyframe_every and frames and len(frames) % keyframe_every == 0:
+        keyframes[len(frames) - 1] = dict(running)
+
+    return schemas.RaceDeltas(
+        season_start_year=season,
+        players=[schemas.RacePlayer(id=p.id, name=p.name) for p in players],
+        frames=frames,
+        keyframe_every=keyframe_every,
+        keyframes=keyframes,
+        match_count=len(frames),
+    )
+
+
+def is_finished_season(db: Session, season: int) -> bool:
+    """Whether a season with matches is over (see season.js::getOngoingSeason).
+
+    Seasons without matches don't count: there is nothing to freeze, and
+    snapshotting any requested year would let clients grow the table.
+    """
+    m = models.Match
+    latest, in_season = db.execute(select(
+        func.max(m.season_start_year),
+        func.count(case((m.season_start_year == season, 1))),
+    )).one()
+    return in_season > 0 and season < ongoing_season(latest)
+
+
+def get_season_snapshot(db: Session, season: int) -> Optional[models.SeasonSnapshot]:
+    """Frozen stats of a finished season, built and persisted on first use.
+
+    Returns None for the ongoing (or a future) season, whose stats still change,
+    and for seasons without matches. Concurrent first requests may both build
+    the snapshot; the row is inserted with ON CONFLICT DO NOTHING, so the
+    second insert is a no-op. The snapshot is derived data, so its commit
+    leaves the response cache alone (cache.commit_derived). Ages are taken at
+    the end of the season, so the frozen payload does not go stale.
+    """
+    if not is_finished_season(db, season):
+        return None
+    snapshot = db.get(models.SeasonSnapshot, season)
+    if snapshot is None:
+        season_end = season_bounds(season)[1]
+        payload = get_season_stats(db, season, as_of=season_end).model_dump_json(by_alias=True)
+        snapshot = models.SeasonSnapshot(
+            season_start_year=season,
+            payload=payload,
+            etag=f'"{hashlib.sha256(payload.encode()).hexdigest()[:32]}"',
+            created_at=datetime.now(),
+        )
+        table = models.SeasonSnapshot.__table__
+        db.execute(upsert_insert(db.get_bind(), table).values(
+            season_start_year=snapshot.season_start_year,
+            payload=snapshot.payload,
+            etag=snapshot.etag,
+            created_at=snapshot.created_at,
+        ).on_conflict_do_nothing(index_elements=[table.c.season_start_year]))
+        cache.commit_derived(db)
+    return snapshot
+
+
+def invalidate_season_snapshots(db: Session, seasons: Optional[Iterable[int]] = None):
+    """Drop the snapshots of the given seasons (all of them if None).
+
+    Part of the caller's transaction: the caller commits.
+    """
+    query = db.query(models.SeasonSnapshot)
+    if seasons is not None:
+        query = query.filter(models.SeasonSnapshot.season_start_year.in_(set(seasons)))
+    query.delete(synchronize_session=False)
@@ -0,0 +1,162 @@
+"""Incrementally maintained per-player, per-season goal tallies.
+
+`player_season_stats` (models.PlayerSeasonTally) is derived from `goals`.
+Write paths keep it current inside their own transaction:
+
+- match writes apply a *delta*: a match contributes a fixed amount to each
+  scorer's row, so creating it adds that contribution, deleting it subtracts
+  it, and editing it subtracts the old and adds the new one;
+- goal reassignments (player deletion, unknown-player cleanup) recompute the
+  rows of the few players involved from `goals` with one INSERT ... SELECT.
+
+`rebuild` / `verify` recompute everything from scratch; see rebuild_tallies.py.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, func, not_, select, tuple_
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import upsert_insert
+
+TALLY_FIELDS = ("goals", "own_goals", "goals_for_old", "goals_for_young", "matches_scored_in")
+
+# (player_id, season_start_year) -> {field: change}
+Delta = Dict[Tuple[int, int], Dict[str, int]]
+
+
+def _empty() -> Dict[str, int]:
+    return dict.fromkeys(TALLY_FIELDS, 0)
+
+
+def match_delta(season: int, goals: Iterable[Tuple[int, bool, str]], sign: int = 1) -> Delta:
+    """Tally change from adding (sign=1) or removing (sign=-1) one match.
+
+    `goals` are the match's (player_id, is_own_goal, team) triples.
+    """
+    delta = defaultdict(_empty)
+    scorers = set()
+    for player_id, is_own_goal, team in goals:
+        if player_id is None:
+            continue
+        row = delta[(player_id, season)]
+        if is_own_goal:
+            row["own_goals"] += sign
+        else:
+            row["goals"] += sign
+            if team == "old":
+                row["goals_for_old"] += sign
+            elif team == "young":
+                row["goals_for_young"] += sign
+            scorers.add(player_id)
+    for player_id in scorers:
+        delta[(player_id, season)]["matches_scored_in"] += sign
+    return delta
+
+
+def merge(*deltas: Delta) -> Delta:
+    """Sum several deltas, dropping keys whose net change is zero."""
+    total = defaultdict(_empty)
+    for delta in deltas:
+        for key, fields in delta.items():
+            for field, change in fields.items():
+                total[key][field] += change
+    return {key: fields for key, fields in total.items() if any(fields.values())}
+
+
+def apply_delta(db: Session, delta: Delta):
+    """Add a delta to the stored tallies. Part of the caller's transaction."""
+    delta = merge(delta)
+    if not delta:
+        return
+    table = models.PlayerSeasonTally.__table__
+    stmt = upsert_insert(db.get_bind(), table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.player_id, table.c.season_start_year],
+        set_={field: table.c[field] + stmt.excluded[field] for field in TALLY_FIELDS},
+    )
+    db.execute(stmt, [
+        {"player_id": player_id, "season_start_year": season, **fields}
+        for (player_id, season), fields in delta.items()
+    ])
+    # A player whose last goal of a season was removed has nothing left to show.
+    db.execute(delete(table).where(
+        tuple_(table.c.player_id, table.c.season_start_year).in_(list(delta)),
+        *(table.c[field] == 0 for field in TALLY_FIELDS),
+    ))
+
+
+def _computed(player_ids: Optional[Iterable[int]] = None):
+    """SELECT computing tally rows from the raw goals (optionally for some players)."""
+    g, m = models.Goal, models.Match
+    own = func.coalesce(g.is_own_goal, False) == True  # noqa: E712 (SQL comparison)
+    scored = not_(own)
+    stmt = (
+        select(
+            g.player_id,
+            m.season_start_year,
+            func.sum(case((scored, 1), else_=0)).label("goals"),
+            func.sum(case((own, 1), else_=0)).label("own_goals"),
+            func.sum(case((and_(scored, g.team == "old"), 1), else_=0)).label("goals_for_old"),
+            func.sum(case((and_(scored, g.team == "young"), 1), else_=0)).label("goals_for_young"),
+            func.count(func.distinct(case((scored, g.match_id)))).label("matches_scored_in"),
+        )
+        .join(m, g.match_id == m.id)
+        .where(g.player_id.is_not(None), m.season_start_year.is_not(None))
+        .group_by(g.player_id, m.season_start_year)
+    )
+    if player_ids is not None:
+        stmt = stmt.where(g.player_id.in_(list(player_ids)))
+    return stmt
+
+
+def recompute(db, player_ids: Optional[Iterable[int]] = None):
+    """Replace the tallies of some players (all if None) with freshly computed
+    rows. `db` may be a Session or a Connection; the caller commits."""
+    table = models.PlayerSeasonTally.__table__
+    clear = delete(table)
+    if player_ids is not None:
+        player_ids = list(player_ids)
+        clear = clear.where(table.c.player_id.in_(player_ids))
+    db.execute(clear)
+    db.execute(table.insert().from_select(
+        ["player_id", "season_start_year", *TALLY_FIELDS], _computed(player_ids)
+    ))
+
+
+def rebuild(db):
+    """Recompute every tally from the goals table."""
+    recompute(db, None)
+
+
+def verify(db) -> list:
+    """Compare the stored tallies with the goals table.
+
+    Returns a list of (player_id, season_start_year, stored, expected) for
+    every row that differs; empty when the tallies are correct.
+    """
+    table = models.PlayerSeasonTally.__table__
+    stored = {
+        (r.player_id, r.season_start_year): {f: getattr(r, f) for f in TALLY_FIELDS}
+        for r in db.execute(select(table))
+    }
+    expected = {
+        (r.player_id, r.season_start_year): {f: getattr(r, f) for f in TALLY_FIELDS}
+        for r in db.execute(_computed())
+    }
+    return [
+        (player_id, season, stored.get((player_id, season)), expected.get((player_id, season)))
+        for player_id, season in sorted(stored.keys() | expected.keys())
+        if stored.get((player_id, season)) != expected.get((player_id, season))
+    ]
+
+
+def ensure_populated(bind):
+    """Build the tallies once for a database that predates them."""
+    table = models.PlayerSeasonTally.__table__
+    with bind.begin() as conn:
+        has_tallies = conn.execute(select(table.c.player_id).limit(1)).first() is not None
+        has_goals = conn.execute(select(models.Goal.id).limit(1)).first() is not None
+        if has_goals and not has_tallies:
+            rebuild(conn)
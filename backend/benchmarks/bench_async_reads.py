@@ -0,0 +1,113 @@
+"""Throughput of the async read path vs the previous sync one under concurrent load.
+
+Serves one page of matches two ways from the same database: through a sync
+`def` handler with a SessionLocal session (how every endpoint used to work,
+each request holding a threadpool worker while it waits) and through an
+`async def` handler with async_crud on the async engine. Fires the same
+number of concurrent requests at both in-process (httpx ASGITransport) and
+reports requests/s and latency percentiles.
+
+Locally the database is a synthetic SQLite file. A SQLite query takes
+microseconds, while a Neon round trip takes tens of milliseconds, so
+--latency-ms simulates the network: every request waits that long per
+statement (3 for a page of matches) while holding its connection, blocking in
+the sync handler and awaiting in the async one. To measure against a real
+Postgres instead, set BENCH_DB_URL (it must already contain data) and pass
+--latency-ms 0.
+
+Usage (from the backend/ directory):
+
+    uv run python benchmarks/bench_async_reads.py [--requests 400] [--concurrency 10,50,200] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("GLOBAL_PASSWORD", "bench")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+_tmp = tempfile.TemporaryDirectory()
+os.environ["FOOTBALL_DB_URL"] = os.getenv("BENCH_DB_URL") or f"sqlite:///{_tmp.name}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app import async_crud, crud, database  # noqa: E402
+from bench_backup_export import build_source  # noqa: E402
+
+STATEMENTS_PER_PAGE = 3  # matches, their goals, the goals' players
+PAGE_SIZE = 10
+
+
+def build_app(latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync/matches")
+    def sync_matches():
+        with database.SessionLocal() as db:
+            db.connection()
+            time.sleep(latency * STATEMENTS_PER_PAGE)
+            matches, _ = crud.get_matches(db, limit=PAGE_SIZE)
+            return {"count": len(matches)}
+
+    @app.get("/async/matches")
+    async def async_matches():
+        async with database.AsyncSessionLocal() as db:
+            await db.connection()
+            await asyncio.sleep(latency * STATEMENTS_PER_PAGE)
+            matches, _ = await async_crud.get_matches(db, limit=PAGE_SIZE)
+            return {"count": len(matches)}
+
+    return app
+
+
+async def load(app: FastAPI, path: str, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return requests / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", default="10,50,200", help="comma-separated concurrency levels")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated round trip per statement")
+    parser.add_argument("--matches", type=int, default=2000, help="size of the synthetic SQLite database")
+    args = parser.parse_args()
+
+    if not os.getenv("BENCH_DB_URL"):
+        build_source(os.path.join(_tmp.name, "bench.db"), args.matches).dispose()
+    database.init_db()
+    app = build_app(args.latency_ms / 1000)
+
+    print(f"{'concurrency':>11} | {'sync req/s':>10} {'p50':>7} {'p95':>7} | {'async req/s':>11} {'p50':>7} {'p95':>7}")
+    for concurrency in (int(c) for c in args.concurrency.split(",")):
+        sync = asyncio.run(load(app, "/sync/matches", args.requests, concurrency))
+        async_ = asyncio.run(load(app, "/async/matches", args.requests, concurrency))
+        print(
+            f"{concurrency:>11} | {sync[0]:>10.0f} {sync[1] * 1000:>5.0f}ms {sync[2] * 1000:>5.0f}ms | "
+            f"{async_[0]:>11.0f} {async_[1] * 1000:>5.0f}ms {async_[2] * 1000:>5.0f}ms"
+        )
+    asyncio.run(database.async_engine.dispose())
+
+
+if __name__ == "__main__":
+    main()
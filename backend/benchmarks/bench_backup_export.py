@@ -0,0 +1,117 @@
+"""Peak memory / time of the backup export on a synthetic, growing dataset.
+
+Builds SQLite source databases with an increasing number of matches (10 goals
+each) and exports them with `crud.export_database_to_sqlite`, next to a copy
+of the previous implementation that materialized every table before inserting.
+The streaming export's peak should stay flat as the history grows; the
+materializing one grows linearly.
+
+Usage (from the backend/ directory):
+
+    uv run python benchmarks/bench_backup_export.py [--sizes 1000,10000,50000]
+
+Peak memory is Python-heap allocations as measured by tracemalloc.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("GLOBAL_PASSWORD", "bench")
+os.environ.setdefault("ADMIN_PASSWORD", "bench")
+
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+
+from app import crud, models  # noqa: E402
+from app.season import season_start_year  # noqa: E402
+
+GOALS_PER_MATCH = 10
+PLAYERS = 40
+
+
+def build_source(path: str, matches: int):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    rng = random.Random(matches)
+    first_day = date(2000, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Player.__table__), [
+            {"id": i, "name": f"Player {i}", "birthdate": date(1990, 1, 1) + timedelta(days=i * 97)}
+            for i in range(1, PLAYERS + 1)
+        ])
+        for start in range(0, matches, 5000):
+            chunk = range(start + 1, min(start + 5000, matches) + 1)
+            match_rows = []
+            goal_rows = []
+            for match_id in chunk:
+                day = first_day + timedelta(days=match_id)
+                match_rows.append({
+                    "id": match_id, "date": day, "season_start_year": season_start_year(day),
+                    "team_young_score": 5, "team_old_score": 5,
+                })
+                for n in range(GOALS_PER_MATCH):
+                    goal_rows.append({
+                        "match_id": match_id, "player_id": rng.randint(1, PLAYERS),
+                        "is_own_goal": rng.random() < 0.05, "team": "young" if n % 2 else "old",
+                    })
+            conn.execute(insert(models.Match.__table__), match_rows)
+            conn.execute(insert(models.Goal.__table__), goal_rows)
+    return engine
+
+
+def export_materialized(dest_path: str, src_engine):
+    """The export as it was before streaming: every table loaded at once."""
+    dst_engine = create_engine(f"sqlite:///{dest_path}")
+    try:
+        models.Base.metadata.create_all(bind=dst_engine)
+        with src_engine.connect() as sconn, dst_engine.begin() as dconn:
+            for table in crud.BACKUP_TABLES:
+                rows = [dict(r) for r in sconn.execute(select(table)).mappings().all()]
+                if rows:
+                    dconn.execute(insert(table), rows)
+    finally:
+        dst_engine.dispose()
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma-separated match counts")
+    args = parser.parse_args()
+
+    print(f"{'matches':>8} {'goals':>8} | {'streaming peak':>15} {'time':>7} | {'materialized peak':>18} {'time':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            src = build_source(os.path.join(tmp, f"src_{size}.db"), size)
+            try:
+                stream_peak, stream_time = measure(
+                    crud.export_database_to_sqlite, os.path.join(tmp, f"stream_{size}.db"), src
+                )
+                full_peak, full_time = measure(
+                    export_materialized, os.path.join(tmp, f"full_{size}.db"), src
+                )
+            finally:
+                src.dispose()
+            print(
+                f"{size:>8} {size * GOALS_PER_MATCH:>8} | "
+                f"{stream_peak / 2**20:>12.1f} MiB {stream_time:>6.2f}s | "
+                f"{full_peak / 2**20:>15.1f} MiB {full_time:>6.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
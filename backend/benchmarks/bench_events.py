@@ -0,0 +1,69 @@
+"""Fan-out cost of the live-update hub (app/events.py) with many idle subscribers.
+
+Starts N subscriber coroutines (what N open /events streams amount to),
+publishes events from a worker thread the way the sync endpoints do, and
+reports how long it takes until every subscriber has received each event,
+plus the process's thread count, which must not grow with N.
+
+Usage (from the backend/ directory):
+
+    uv run python benchmarks/bench_events.py [--subscribers 100,500,2000] [--events 50]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app import events  # noqa: E402
+
+
+async def run(subscribers: int, count: int):
+    hub = events.Hub()
+    remaining = [subscribers] * count  # per event: subscribers still waiting
+    latencies = []
+    done = asyncio.Event()
+
+    async def subscriber(subscription):
+        for _ in range(count):
+            event = await subscription.get()
+            seq = event.data["seq"]
+            remaining[seq] -= 1
+            if remaining[seq] == 0:
+                latencies.append(time.perf_counter() - event.data["sent"])
+                if len(latencies) == count:
+                    done.set()
+
+    tasks = [asyncio.create_task(subscriber(hub.subscribe())) for _ in range(subscribers)]
+    threads = threading.active_count()
+
+    def publisher():
+        for seq in range(count):
+            hub.publish("match.deleted", {"seq": seq, "sent": time.perf_counter()})
+            time.sleep(0.002)
+
+    await asyncio.to_thread(publisher)
+    await asyncio.wait_for(done.wait(), 30)
+    for task in tasks:
+        task.cancel()
+    return statistics.median(latencies), max(latencies), threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", default="100,500,2000", help="comma-separated subscriber counts")
+    parser.add_argument("--events", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'subscribers':>11} | {'p50 fan-out':>11} {'max':>8} | threads")
+    for n in (int(s) for s in args.subscribers.split(",")):
+        p50, worst, threads = asyncio.run(run(n, args.events))
+        print(f"{n:>11} | {p50 * 1000:>9.2f}ms {worst * 1000:>6.2f}ms | {threads}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Import-time cost of the app, per module.
+
+Imports a module (default `app.main`, i.e. what the server loads before it
+can answer) in fresh interpreters with `python -X importtime`, and reports
+the median total and the most expensive modules by cumulative time.
+With --max-ms it exits 1 when the median total exceeds the budget, so a
+startup regression (an eager heavy import) can be caught in CI.
+
+Usage (from the backend/ directory):
+
+    uv run python benchmarks/bench_import.py [--module app.main] [--runs 5] [--top 25] [--max-ms 800]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def import_once(module: str):
+    """(wall seconds, {module: (self us, cumulative us)}) for one fresh import."""
+    env = {**os.environ, "GLOBAL_PASSWORD": "bench", "ADMIN_PASSWORD": "bench"}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        sys.exit(f"import {module} failed:\n" + "\n".join(errors[-5:]))
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return elapsed, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--max-ms", type=float, help="fail if the median import takes longer")
+    args = parser.parse_args()
+
+    runs = [import_once(args.module) for _ in range(args.runs)]
+    walls = [wall for wall, _ in runs]
+    names = set().union(*(modules for _, modules in runs))
+    cumulative = {
+        name: statistics.median(modules.get(name, (0, 0))[1] for _, modules in runs) for name in names
+    }
+    self_time = {
+        name: statistics.median(modules.get(name, (0, 0))[0] for _, modules in runs) for name in names
+    }
+
+    total_ms = statistics.median(walls) * 1000
+    print(f"import {args.module}: median {total_ms:.0f} ms wall over {args.runs} runs "
+          f"(interpreter start included), {len(names)} modules")
+    print(f"{'cumulative':>11} {'self':>9}  module")
+    for name in sorted(names, key=cumulative.get, reverse=True)[:args.top]:
+        print(f"{cumulative[name] / 1000:>9.1f}ms {self_time[name] / 1000:>7.1f}ms  {name}")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"Import took {total_ms:.0f} ms, over the {args.max_ms:.0f} ms budget.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
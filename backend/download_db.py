@@ -1,28 +1,160 @@
+"""Fetch the SQLite database from Google Drive at startup (see start.sh).
+
+The download is skipped when the local file already matches the remote one,
+resumes from a `.part` file after an interrupted run, and replaces the
+database atomically once the whole file has arrived and its checksum matches.
+
+- `<dest>.manifest.json` records the remote file's md5 / modified time / size
+  and the local file's size and mtime right after the download. If neither
+  side changed since, nothing is fetched. If only the local file changed, it
+  is hashed and compared with the remote md5.
+- `<dest>.part` collects the bytes; `<dest>.part.json` says which remote
+  version they belong to, so a partial download is only resumed if the remote
+  file is still the same.
+
+Where the file comes from is pluggable: `sync` takes any object with
+`metadata(file_id)` and `read(file_id, start, length)`, like `DriveSource`.
+"""
+import hashlib
+import json
 import os
-import io
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from google.oauth2 import service_account
 
 load_dotenv()
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+class DriveSource:
+    """A Google Drive file, read with a service account."""
+
+    def __init__(self, creds_path):
+        # The Google API client is slow to import; only pay for it when downloading.
+        from googleapiclient.discovery import build
+        from google.oauth2 import service_account
+
+        creds = service_account.Credentials.from_service_account_file(
+            creds_path, scopes=['https://www.googleapis.com/auth/drive']
+        )
+        self.service = build('drive', 'v3', credentials=creds)
+
+    def metadata(self, file_id):
+        """{"md5", "modified", "size"} of the remote file."""
+        meta = self.service.files().get(
+            fileId=file_id, fields="md5Checksum,modifiedTime,size"
+        ).execute()
+        return {"md5": meta.get("md5Checksum"), "modified": meta.get("modifiedTime"), "size": int(meta["size"])}
+
+    def read(self, file_id, start, length):
+        """Bytes [start, start + length) of the remote file."""
+        request = self.service.files().get_media(fileId=file_id)
+        response, content = request.http.request(
+            request.uri, method="GET", headers={"Range": f"bytes={start}-{start + length - 1}"}
+        )
+        if response.status == 200:  # Range ignored: whole file
+            return content[start:start + length]
+        if response.status != 206:
+            raise RuntimeError(f"Drive download failed with HTTP {response.status}")
+        return content
+
+
+def _md5(path):
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _remote_key(file_id, meta):
+    return {"file_id": file_id, "md5": meta["md5"], "modified": meta["modified"], "size": meta["size"]}
+
+
+def is_current(file_id, dest_path, meta):
+    """Whether the local file already has the remote file's content."""
+    if not os.path.exists(dest_path):
+        return False
+    stat = os.stat(dest_path)
+    if stat.st_size != meta["size"]:
+        return False
+    manifest = _load_json(dest_path + ".manifest.json")
+    if (
+        manifest is not None
+        and manifest["remote"] == _remote_key(file_id, meta)
+        and manifest["local"] == {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    ):
+        return True
+    # The manifest is missing or the local file was touched: compare contents.
+    return meta["md5"] is not None and _md5(dest_path) == meta["md5"]
+
+
+def sync(source, file_id, dest_path, chunk_size=CHUNK_SIZE, progress=print):
+    """Make `dest_path` a copy of the remote file. Returns "unchanged",
+    "downloaded" or "resumed"."""
+    meta = source.metadata(file_id)
+    manifest_path = dest_path + ".manifest.json"
+    if is_current(file_id, dest_path, meta):
+        status = "unchanged"
+    else:
+        part_path, part_manifest_path = dest_path + ".part", dest_path + ".part.json"
+        remote = _remote_key(file_id, meta)
+        offset = 0
+        if os.path.exists(part_path) and _load_json(part_manifest_path) == remote:
+            offset = min(os.path.getsize(part_path), meta["size"])
+        _save_json(part_manifest_path, remote)
+        status = "resumed" if offset else "downloaded"
+
+        with open(part_path, "r+b" if offset else "wb") as f:
+            f.seek(offset)
+            f.truncate()
+            while offset < meta["size"]:
+                data = source.read(file_id, offset, min(chunk_size, meta["size"] - offset))
+                if not data:
+                    raise RuntimeError(f"Download stalled at byte {offset} of {meta['size']}")
+                f.write(data)
+                f.flush()
+                offset += len(data)
+                progress(f"Download {int(offset * 100 / meta['size'])}%.")
+            os.fsync(f.fileno())
+
+        if meta["md5"] is not None and _md5(part_path) != meta["md5"]:
+            os.remove(part_path)
+            os.remove(part_manifest_path)
+            raise RuntimeError("Downloaded file does not match the remote checksum; removed it")
+        os.replace(part_path, dest_path)
+        os.remove(part_manifest_path)
+
+    stat = os.stat(dest_path)
+    _save_json(manifest_path, {
+        "remote": _remote_key(file_id, meta),
+        "local": {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+    })
+    return status
+
+
 def download_db_from_gdrive(file_id, dest_path, creds_path):
-    creds = service_account.Credentials.from_service_account_file(
-        creds_path, scopes=['https://www.googleapis.com/auth/drive']
-    )
-    service = build('drive', 'v3', credentials=creds)
-    request = service.files().get_media(fileId=file_id)
-    fh = io.FileIO(dest_path, 'wb')
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-        if status:
-            print(f"Download {int(status.progress() * 100)}%.")
-    print(f"Downloaded {dest_path} from Google Drive.")
+    status = sync(DriveSource(creds_path), file_id, dest_path)
+    if status == "unchanged":
+        print(f"{dest_path} is up to date with Google Drive; skipped the download.")
+    else:
+        print(f"Downloaded {dest_path} from Google Drive ({status}).")
 
 if __name__ == "__main__":
     FILE_ID = os.environ.get("GDRIVE_DB_FILE_ID")
@@ -39,4 +171,4 @@ if __name__ == "__main__":
         print("Missing FILE_ID or Service Account JSON.")
         exit(1)
 
-    download_db_from_gdrive(FILE_ID, DEST_PATH, CREDS_PATH) 
\ No newline at end of file
+    download_db_from_gdrive(FILE_ID, DEST_PATH, CREDS_PATH)
@@ -0,0 +1,36 @@
+"""Rebuild (or just verify) the player_season_stats tallies from the raw goals.
+
+The tallies are maintained incrementally by every write path (see
+app/tallies.py); this is the escape hatch if they ever drift, e.g. after
+editing the database by hand.
+
+Usage (from the backend/ directory, against $FOOTBALL_DB_URL or the local
+SQLite file):
+
+    uv run python rebuild_tallies.py            # recompute everything
+    uv run python rebuild_tallies.py --check    # only report differences (exit 1 if any)
+"""
+import sys
+
+from app import tallies
+from app.database import engine, init_db
+
+
+def main():
+    check_only = "--check" in sys.argv[1:]
+    init_db()
+
+    with engine.begin() as conn:
+        mismatches = tallies.verify(conn)
+        for player_id, season, stored, expected in mismatches:
+            print(f"  player {player_id}, season {season}: stored {stored}, expected {expected}")
+        if check_only:
+            print(f"{len(mismatches)} tally rows differ from the goals table.")
+            sys.exit(1 if mismatches else 0)
+        tallies.rebuild(conn)
+
+    print(f"Rebuilt tallies ({len(mismatches)} rows were out of date).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,13 @@
 #!/bin/bash
-python download_db.py
-uvicorn app.main:app --reload --host 0.0.0.0 --port 10000
\ No newline at end of file
+# Production entry point. For local development run
+# `uv run uvicorn app.main:app --reload` instead (see README).
+
+# The Google Drive download only applies to the SQLite setup; skip it (and
+# the Google API client import) unless it is configured.
+if [ -n "$GDRIVE_DB_FILE_ID" ]; then
+    python download_db.py
+fi
+
+# No --reload: the file watcher is a second process and a slower start.
+# A single worker: the response cache (app/cache.py) is per process.
+exec uvicorn app.main:app --host 0.0.0.0 --port 10000
@@ -1,7 +1,12 @@
+import base64
+import json
 import sys
 import os
 import shutil
 import pytest
+from contextlib import contextmanager
+from datetime import date, datetime
+from sqlalchemy import event
 
 # Set environment variables BEFORE importing the app
 os.environ["GLOBAL_PASSWORD"] = "test_global_password"
@@ -10,8 +15,8 @@ os.environ["ADMIN_PASSWORD"] = "test_admin_password"
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from fastapi.testclient import TestClient
 from app.main import app
-from app.database import Base, SessionLocal, engine
-from app import models
+from app.database import Base, SessionLocal, async_engine, engine
+from app import cache, events, models, stats, tallies
 
 # Use a separate test database
 TEST_DB_URL = "sqlite:///./test_football.db"
@@ -35,15 +40,43 @@ def cleanup_database():
     """Clean up the database between tests to avoid conflicts."""
     db = SessionLocal()
     try:
+        db.query(models.PlayerSeasonTally).delete()
         db.query(models.Goal).delete()
         db.query(models.Match).delete()
         db.query(models.Player).delete()
+        db.query(models.SeasonSnapshot).delete()
         db.commit()
     finally:
         db.close()
 
 client = TestClient(app)
 
+@contextmanager
+def assert_query_count(expected):
+    """Assert that the block issues exactly `expected` SQL statements
+    (None: just collect them).
+
+    Guards the read paths against N+1 regressions: a per-row lazy load shows
+    up here as a count that grows with the data instead of as latency.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # The read endpoints run on the async engine, writes on the sync one.
+    engines = (engine, async_engine.sync_engine)
+    for e in engines:
+        event.listen(e, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", before_cursor_execute)
+    assert expected is None or len(statements) == expected, (
+        f"expected {expected} SQL statements, got {len(statements)}:\n" + "\n".join(statements)
+    )
+
 # Helper function to get authentication headers
 def get_auth_headers(global_password=None, admin_password=None):
     headers = {}
@@ -67,7 +100,9 @@ def test_create_player():
         "birthdate": "2000-01-01"
     }
     headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
-    response = client.post("/players/", json=player_data, headers=headers)
+    # One INSERT ... ON CONFLICT DO NOTHING, then the player and their goals.
+    with assert_query_count(3):
+        response = client.post("/players/", json=player_data, headers=headers)
     assert response.status_code == 200
     data = response.json()
     assert data["name"] == "Test Player"
@@ -227,4 +262,1119 @@ def test_admin_auth_required():
     assert response.status_code == 401
     
     response = client.delete("/players/1", headers=headers)
-    assert response.status_code == 401
\ No newline at end of file
+    assert response.status_code == 401
+
+def test_season_stats():
+    """Test the server-side season stats: tallies, podium, summary and race frames."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "2005-01-01"}, headers=headers).json()
+    client.post("/matches/", json={
+        "date": "2024-07-20", "team_young_score": 1, "team_old_score": 2,
+        "goals": [
+            {"player_id": alice["id"], "is_own_goal": False, "team": "old"},
+            {"player_id": alice["id"], "is_own_goal": False, "team": "old"},
+            {"player_id": bob["id"], "is_own_goal": False, "team": "young"},
+        ],
+    }, headers=headers)
+    client.post("/matches/", json={
+        "date": "2025-03-01", "team_young_score": 4, "team_old_score": 0,
+        "goals": [
+            {"player_id": bob["id"], "is_own_goal": False, "team": "young"},
+            {"player_id": alice["id"], "is_own_goal": True, "team": "young"},
+        ],
+    }, headers=headers)
+    # Different season (after the mid-June cutoff) — must not be counted.
+    client.post("/matches/", json={
+        "date": "2025-06-20", "team_young_score": 0, "team_old_score": 1,
+        "goals": [{"player_id": alice["id"], "is_own_goal": False, "team": "old"}],
+    }, headers=headers)
+
+    assert client.get("/seasons/", headers=headers).json() == [2025, 2024]
+
+    response = client.get("/stats/2024", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["matchCount"] == 2
+    assert data["totalGoals"] == 7
+    assert data["summary"] == {"oldGoals": 2, "youngGoals": 5, "oldWins": 1, "youngWins": 1, "draws": 0}
+    assert data["biggestWin"]["score"] == "0:4"
+    assert [(p["name"], p["goals"]) for p in data["leaderboard"]] == [("Alice", 2), ("Bob", 2)]
+    assert data["ownGoalLeader"]["name"] == "Alice"
+    assert data["leaderboard"][0]["team"] == "old"
+    frames = data["race"]["frames"]
+    assert frames[0]["cumulative"] == {str(alice["id"]): 2, str(bob["id"]): 1}
+    assert frames[1]["cumulative"] == {str(alice["id"]): 2, str(bob["id"]): 2}
+
+    all_time = client.get("/stats/", headers=headers).json()
+    assert all_time["matchCount"] == 3
+
+def test_upgrade_schema_backfills_season(tmp_path):
+    """Test that upgrade_schema adds and backfills matches.season_start_year and creates the indexes on a pre-existing database."""
+    from sqlalchemy import create_engine, inspect, text
+    from app.database import upgrade_schema
+
+    old_engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old_engine.begin() as conn:
+        conn.execute(text("CREATE TABLE players (id INTEGER PRIMARY KEY, name VARCHAR, birthdate DATE)"))
+        conn.execute(text("CREATE TABLE matches (id INTEGER PRIMARY KEY, date DATE, team_young_score INTEGER, team_old_score INTEGER)"))
+        conn.execute(text("CREATE TABLE goals (id INTEGER PRIMARY KEY, match_id INTEGER, player_id INTEGER, is_own_goal BOOLEAN, team VARCHAR)"))
+        conn.execute(text("CREATE TABLE player_visibility (id INTEGER PRIMARY KEY, player_id INTEGER, season_start_year INTEGER, hidden BOOLEAN)"))
+        conn.execute(text("INSERT INTO matches VALUES (1, '2025-06-14', 1, 0), (2, '2025-06-15', 0, 1)"))
+
+    upgrade_schema(old_engine)
+    upgrade_schema(old_engine)  # idempotent
+
+    with old_engine.connect() as conn:
+        seasons = conn.execute(text("SELECT id, season_start_year FROM matches ORDER BY id")).all()
+    assert [tuple(r) for r in seasons] == [(1, 2024), (2, 2025)]
+    inspector = inspect(old_engine)
+    assert "ix_matches_season_date" in {i["name"] for i in inspector.get_indexes("matches")}
+    assert {"ix_goals_match_id", "ix_goals_player_match"} <= {i["name"] for i in inspector.get_indexes("goals")}
+    old_engine.dispose()
+
+def test_keyset_pagination_and_filters():
+    """Test cursor pagination over /matches/ and /players/ and the season/date/player filters."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    players = [
+        client.post("/players/", json={"name": name, "birthdate": "2000-01-01"}, headers=headers).json()
+        for name in ("Cara", "Anna", "Bea")
+    ]
+    dates = ["2024-08-01", "2024-07-01", "2025-01-01", "2025-07-01", "2024-07-01"]
+    for i, d in enumerate(dates):
+        client.post("/matches/", json={
+            "date": d, "team_young_score": 1, "team_old_score": 0,
+            "goals": [{"player_id": players[i % 3]["id"], "is_own_goal": False, "team": "young"}],
+        }, headers=headers)
+
+    # Walk the matches two at a time; every match is seen once, in (date, id) order.
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/matches/", params=params, headers=headers)
+        assert response.status_code == 200
+        seen += response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert [m["date"] for m in seen] == sorted(dates)
+    assert len({m["id"] for m in seen}) == len(dates)
+
+    # No limit: nothing is truncated.
+    assert len(client.get("/matches/", headers=headers).json()) == len(dates)
+
+    assert len(client.get("/matches/", params={"season": 2024}, headers=headers).json()) == 4
+    ranged = client.get("/matches/", params={"from": "2024-07-15", "to": "2025-01-01"}, headers=headers).json()
+    assert [m["date"] for m in ranged] == ["2024-08-01", "2025-01-01"]
+    by_player = client.get("/matches/", params={"player_id": players[0]["id"]}, headers=headers).json()
+    assert {m["date"] for m in by_player} == {"2024-08-01", "2025-07-01"}
+
+    page = client.get("/players/", params={"limit": 2}, headers=headers)
+    assert [p["name"] for p in page.json()] == ["Anna", "Bea"]
+    rest = client.get("/players/", params={"limit": 2, "cursor": page.headers["X-Next-Cursor"]}, headers=headers)
+    assert [p["name"] for p in rest.json()] == ["Cara"]
+    assert "X-Next-Cursor" not in rest.headers
+
+    # Season filter on /players/ restricts embedded goals, not the roster.
+    season_players = client.get("/players/", params={"season": 2025}, headers=headers).json()
+    assert len(season_players) == 3
+    assert sum(len(p["goals"]) for p in season_players) == 1
+
+    assert client.get("/matches/", params={"cursor": "not-a-cursor"}, headers=headers).status_code == 400
+    # Valid JSON, wrong types: a number where the date goes, a string for the id.
+    wrong_types = base64.urlsafe_b64encode(json.dumps([1, "x"]).encode()).decode()
+    for path in ("/matches/", "/players/"):
+        assert client.get(path, params={"cursor": wrong_types, "limit": 5}, headers=headers).status_code == 400
+
+def test_read_query_counts():
+    """Test that the list endpoints issue a fixed number of SQL statements regardless of how many goals exist."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    players = [
+        client.post("/players/", json={"name": f"Player {i}", "birthdate": "2000-01-01"}, headers=headers).json()
+        for i in range(4)
+    ]
+    for day in range(1, 6):
+        client.post("/matches/", json={
+            "date": f"2024-09-{day:02d}", "team_young_score": 2, "team_old_score": 2,
+            "goals": [
+                {"player_id": p["id"], "is_own_goal": False, "team": "young" if i % 2 else "old"}
+                for i, p in enumerate(players)
+            ],
+        }, headers=headers)
+
+    # players + their goals + those goals' matches
+    with assert_query_count(3):
+        data = client.get("/players/", headers=headers).json()
+    assert sum(len(p["goals"]) for p in data) == 20
+    assert all(g["match"]["date"] for p in data for g in p["goals"])
+
+    # matches + their goals + those goals' players
+    with assert_query_count(3):
+        data = client.get("/matches/", headers=headers).json()
+    assert all(g["player"]["name"] for m in data for g in m["goals"])
+
+    # 2024 is a finished season, so the first request also builds its snapshot:
+    # season check, snapshot lookup, then matches, per-player tallies, players,
+    # per-match race counts, and the snapshot insert.
+    with assert_query_count(7):
+        client.get("/stats/2024", headers=headers)
+
+def test_compact_format():
+    """Test the opt-in compact columnar representation of the player and match lists."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "1985-01-01"}, headers=headers).json()
+    match = client.post("/matches/", json={
+        "date": "2024-07-20", "team_young_score": 2, "team_old_score": 1,
+        "goals": [
+            {"player_id": alice["id"], "is_own_goal": False, "team": "young"},
+            {"player_id": alice["id"], "is_own_goal": False, "team": "young"},
+            {"player_id": bob["id"], "is_own_goal": True, "team": "young"},
+        ],
+    }, headers=headers).json()
+
+    response = client.get("/players/", params={"format": "compact"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/vnd.sgks.compact+json")
+    data = response.json()
+    assert data["players"]["name"] == ["Alice", "Bob"]
+    # The match is listed once, however many goals reference it.
+    assert data["matches"] == {"id": [match["id"]], "date": ["2024-07-20"], "team_young_score": [2], "team_old_score": [1]}
+    assert sorted(data["goals"]["player_id"]) == sorted([alice["id"], alice["id"], bob["id"]])
+    assert data["goals"]["is_own_goal"].count(True) == 1
+
+    accept = {**headers, "Accept": "application/vnd.sgks.compact+json"}
+    data = client.get("/matches/", headers=accept).json()
+    assert data["matches"]["id"] == [match["id"]]
+    assert data["players"]["name"] == ["Alice", "Bob"]
+    assert len(data["goals"]["id"]) == 3
+
+    assert client.get("/players/", params={"format": "xml"}, headers=headers).status_code == 422
+
+def test_etag_revalidation():
+    """Test that GETs return an ETag, answer 304 while nothing changed, and change tag after a write."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers)
+
+    first = client.get("/players/", headers=headers)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    # Unchanged data: 304 without running any query.
+    with assert_query_count(0):
+        again = client.get("/players/", headers={**headers, "If-None-Match": etag})
+    assert again.status_code == 304
+    # Different representation, different tag.
+    assert client.get("/players/", params={"format": "compact"}, headers=headers).headers["ETag"] != etag
+
+    client.post("/players/", json={"name": "Bob", "birthdate": "1990-01-01"}, headers=headers)
+    fresh = client.get("/players/", headers={**headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert [p["name"] for p in fresh.json()] == ["Alice", "Bob"]
+
+def test_response_cache_is_bounded(monkeypatch):
+    """Test that arbitrary query strings can't grow the response cache beyond its limit."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    monkeypatch.setattr(cache, "CACHE_MAX_ENTRIES", 2)
+    for n in range(3):
+        client.get("/players/", params={"junk": n}, headers=headers)
+    client.get("/players/", params={"junk": 1}, headers=headers)  # now the most recently used
+    client.get("/players/", params={"junk": 3}, headers=headers)
+    assert [key.split("|")[1] for key in cache._entries] == ["junk=1", "junk=3"]
+
+def test_finished_season_snapshot():
+    """Test that finished seasons are served from a frozen snapshot that a match edit invalidates."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    match = client.post("/matches/", json={
+        "date": "2023-09-01", "team_young_score": 0, "team_old_score": 1,
+        "goals": [{"player_id": alice["id"], "is_own_goal": False, "team": "old"}],
+    }, headers=headers).json()
+
+    first = client.get("/stats/2023", headers=headers)
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert first.json()["leaderboard"][0]["goals"] == 1
+    # Ages are frozen at the end of the season, not at the time of the request.
+    assert first.json()["leaderboard"][0]["age"] == (date(2024, 6, 15) - date(1990, 1, 1)).days / 365.25
+
+    # Served from the snapshot: latest season lookup + snapshot row.
+    with assert_query_count(2):
+        again = client.get("/stats/2023", headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+    # Building a snapshot in a GET is not a data change: cached bodies stay valid.
+    db = SessionLocal()
+    try:
+        db.query(models.SeasonSnapshot).delete()
+        db.commit()
+        version = cache.current_version()
+        assert stats.get_season_snapshot(db, 2023) is not None
+        assert cache.current_version() == version
+
+        # Years without matches are served but never persisted.
+        assert client.get("/stats/1", headers=headers).status_code == 200
+        assert client.get("/stats/1999", headers=headers).status_code == 200
+        assert [s.season_start_year for s in db.query(models.SeasonSnapshot)] == [2023]
+    finally:
+        db.close()
+
+    client.put(f"/matches/{match['id']}", json={
+        "date": "2023-09-01", "team_young_score": 0, "team_old_score": 2,
+        "goals": [{"player_id": alice["id"], "is_own_goal": False, "team": "old"}] * 2,
+    }, headers=headers)
+    updated = client.get("/stats/2023", headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert updated.status_code == 200
+    assert updated.json()["leaderboard"][0]["goals"] == 2
+
+def test_concurrent_season_snapshot_build(monkeypatch):
+    """Test that two first requests building the same snapshot don't collide on its primary key."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    client.post("/matches/", json={
+        "date": "2023-09-01", "team_young_score": 0, "team_old_score": 1,
+        "goals": [{"player_id": alice["id"], "is_own_goal": False, "team": "old"}],
+    }, headers=headers)
+
+    build = stats.get_season_stats
+
+    def build_while_another_request_does(db, season, as_of=None):
+        result = build(db, season, as_of)
+        monkeypatch.setattr(stats, "get_season_stats", build)
+        other = SessionLocal()
+        try:
+            assert stats.get_season_snapshot(other, season) is not None
+        finally:
+            other.close()
+        return result
+
+    monkeypatch.setattr(stats, "get_season_stats", build_while_another_request_does)
+    response = client.get("/stats/2023", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["leaderboard"][0]["goals"] == 1
+
+def test_player_season_tallies():
+    """Test that the player_season_stats tallies follow match create/update/delete, player deletion and reassignment."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "2005-01-01"}, headers=headers).json()
+
+    def tally_rows():
+        db = SessionLocal()
+        try:
+            assert tallies.verify(db) == []
+            return {
+                (t.player_id, t.season_start_year): (t.goals, t.own_goals, t.goals_for_old, t.goals_for_young, t.matches_scored_in)
+                for t in db.query(models.PlayerSeasonTally)
+            }
+        finally:
+            db.close()
+
+    m1 = client.post("/matches/", json={
+        "date": "2024-09-01", "team_young_score": 1, "team_old_score": 2,
+        "goals": [
+            {"player_id": alice["id"], "is_own_goal": False, "team": "old"},
+            {"player_id": alice["id"], "is_own_goal": False, "team": "old"},
+            {"player_id": bob["id"], "is_own_goal": True, "team": "old"},
+        ],
+    }, headers=headers).json()
+    m2 = client.post("/matches/", json={
+        "date": "2024-10-01", "team_young_score": 1, "team_old_score": 0,
+        "goals": [{"player_id": bob["id"], "is_own_goal": False, "team": "young"}],
+    }, headers=headers).json()
+    assert tally_rows() == {(alice["id"], 2024): (2, 0, 2, 0, 1), (bob["id"], 2024): (1, 1, 0, 1, 1)}
+
+    # Move the first match into the next season and drop one of Alice's goals.
+    client.put(f"/matches/{m1['id']}", json={
+        "date": "2025-09-01", "team_young_score": 0, "team_old_score": 1,
+        "goals": [{"player_id": alice["id"], "is_own_goal": False, "team": "old"}],
+    }, headers=headers)
+    assert tally_rows() == {(alice["id"], 2025): (1, 0, 1, 0, 1), (bob["id"], 2024): (1, 0, 0, 1, 1)}
+
+    client.delete(f"/matches/{m2['id']}", headers=headers)
+    assert tally_rows() == {(alice["id"], 2025): (1, 0, 1, 0, 1)}
+
+    client.delete(f"/players/{alice['id']}", headers=headers)
+    unknown = client.get("/unknown-player/goals", headers=headers).json()
+    unknown_id = unknown[0]["player_id"]
+    assert tally_rows() == {(unknown_id, 2025): (1, 0, 1, 0, 1)}
+
+    client.post("/unknown-player/reassign", json={"goal_ids": [unknown[0]["id"]], "new_player_id": bob["id"]}, headers=headers)
+    assert tally_rows() == {(bob["id"], 2025): (1, 0, 1, 0, 1)}
+
+def test_season_race_deltas():
+    """Test the delta-encoded goal race: per-match deltas, empty matches and keyframes."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "2005-01-01"}, headers=headers).json()
+    goals_per_match = [
+        [alice["id"], alice["id"], bob["id"]],
+        [],
+        [bob["id"]],
+        [alice["id"]],
+    ]
+    for day, scorers in enumerate(goals_per_match, start=1):
+        client.post("/matches/", json={
+            "date": f"2024-09-{day:02d}", "team_young_score": len(scorers), "team_old_score": 0,
+            "goals": [{"player_id": pid, "is_own_goal": False, "team": "young"} for pid in scorers]
+                     + [{"player_id": bob["id"], "is_own_goal": True, "team": "old"}],
+        }, headers=headers)
+
+    data = client.get("/stats/2024/race", params={"keyframe_every": 2}, headers=headers).json()
+    assert data["matchCount"] == 4
+    assert [p["name"] for p in data["players"]] == ["Alice", "Bob"]
+    a, b = str(alice["id"]), str(bob["id"])
+    assert [f["deltas"] for f in data["frames"]] == [{a: 2, b: 1}, {}, {b: 1}, {a: 1}]
+    assert data["keyframes"] == {"1": {a: 2, b: 1}, "3": {a: 3, b: 2}}
+
+    # Without keyframes only the deltas are sent.
+    assert client.get("/stats/2024/race", headers=headers).json()["keyframes"] == {}
+
+def test_export_streams_in_batches(tmp_path):
+    """Test that the streaming backup export copies every row when tables span several batches."""
+    from sqlalchemy import create_engine, func, select
+    from app import crud
+
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    player = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    for day in range(1, 8):
+        client.post("/matches/", json={
+            "date": f"2024-09-{day:02d}", "team_young_score": 1, "team_old_score": 0,
+            "goals": [{"player_id": player["id"], "is_own_goal": False, "team": "young"}],
+        }, headers=headers)
+
+    dest = tmp_path / "backup.db"
+    crud.export_database_to_sqlite(str(dest), batch_size=3)
+    backup = create_engine(f"sqlite:///{dest}")
+    try:
+        with backup.connect() as conn:
+            counts = {t.name: conn.execute(select(func.count()).select_from(t)).scalar() for t in crud.BACKUP_TABLES}
+    finally:
+        backup.dispose()
+    assert counts == {"players": 1, "matches": 7, "goals": 7, "player_visibility": 0}
+
+def test_backup_jobs(tmp_path, monkeypatch):
+    """Test that backup jobs run in the background, deduplicate and report progress."""
+    import threading
+    from app import backup, crud
+
+    cleanup_database()
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path))
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    player = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    client.post("/matches/", json={
+        "date": "2024-09-01", "team_young_score": 1, "team_old_score": 0,
+        "goals": [{"player_id": player["id"], "is_own_goal": False, "team": "young"}],
+    }, headers=headers)
+
+    # Hold the export until both requests have been made, then write to the
+    # database between the job's first checksum pass and its export.
+    release = threading.Event()
+    export = crud.export_database_to_sqlite
+
+    def gated_export(*args, **kwargs):
+        release.wait(10)
+        db = SessionLocal()
+        try:
+            db.add(models.Player(name="Late"))
+            db.commit()
+        finally:
+            db.close()
+        return export(*args, **kwargs)
+
+    monkeypatch.setattr(crud, "export_database_to_sqlite", gated_export)
+    first = client.post("/backup/jobs", headers=headers)
+    second = client.post("/backup/jobs", headers=headers)
+    assert first.status_code == 202
+    job_id = first.json()["job_id"]
+    assert second.json()["job_id"] == job_id
+    assert client.get(f"/backup/jobs/{job_id}/download", headers=headers).status_code == 409
+    release.set()
+    assert backup.get_job(job_id).wait(10)
+
+    job = client.get(f"/backup/jobs/{job_id}", headers=headers).json()
+    assert job["status"] == "done"
+    assert job["tables_done"] == job["tables_total"] == len(crud.BACKUP_TABLES)
+    assert job["rows_copied"] == 4  # players, match, goal
+    download = client.get(f"/backup/jobs/{job_id}/download", headers=headers)
+    assert download.status_code == 200
+    assert download.content.startswith(b"SQLite format 3")
+    # The stored checksums describe the exported file, including the late write.
+    stored = backup.load_index()[0]
+    assert stored["tables"] == backup._file_checksums(backup._path(stored["filename"]))
+    assert stored["tables"]["players"]["rows"] == 2
+
+    # A new request after completion starts a fresh job; with a history of
+    # one, the finished job before it is forgotten.
+    monkeypatch.setattr(backup, "BACKUP_JOB_HISTORY", 1)
+    fresh = client.post("/backup/jobs", headers=headers).json()["job_id"]
+    assert fresh != job_id
+    assert backup.get_job(fresh).wait(10)
+    assert client.get(f"/backup/jobs/{job_id}", headers=headers).status_code == 404
+    assert client.get(f"/backup/jobs/{job_id}/download", headers=headers).status_code == 404
+    assert client.get(f"/backup/jobs/{fresh}/download", headers=headers).status_code == 200
+    assert client.get("/backup/jobs/unknown", headers=headers).status_code == 404
+    assert client.get(f"/backup/jobs/{job_id}", headers=get_auth_headers(TEST_GLOBAL_PASSWORD)).status_code == 401
+
+def test_backup_store_dedup_incremental_retention(tmp_path, monkeypatch):
+    """Test that unchanged data reuses the last backup, incrementals restore to the live data and retention prunes."""
+    from app import backup
+
+    cleanup_database()
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path))
+    monkeypatch.setattr(backup, "BACKUP_RETENTION", 2)
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+
+    def run(kind="full"):
+        job_id = client.post(f"/backup/jobs?kind={kind}", headers=headers).json()["job_id"]
+        assert backup.get_job(job_id).wait(10)
+        job = client.get(f"/backup/jobs/{job_id}", headers=headers).json()
+        assert job["status"] == "done", job["error"]
+        return job
+
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "1991-01-01"}, headers=headers).json()
+    first = run()
+    again = run()
+    assert again["unchanged"] and again["filename"] == first["filename"]
+
+    client.put(f"/players/{alice['id']}", json={"name": "Alicia", "birthdate": "1990-01-01"}, headers=headers)
+    client.delete(f"/players/{bob['id']}", headers=headers)
+    client.post("/players/", json={"name": "Carol", "birthdate": "1992-01-01"}, headers=headers)
+    incremental = run("incremental")
+    assert incremental["kind"] == "incremental" and not incremental["unchanged"]
+    # Alicia changed; Carol and the unknown player (created by the deletion)
+    # are new; Bob's deletion is recorded separately.
+    assert incremental["rows_copied"] == 4
+    assert run("incremental")["filename"] == incremental["filename"]
+
+    restored = tmp_path / "restored.db"
+    backup.materialize(incremental["filename"], str(restored))
+    from sqlalchemy import create_engine
+    restored_engine = create_engine(f"sqlite:///{restored}")
+    try:
+        assert backup.table_checksums(restored_engine) == backup.table_checksums(engine)
+    finally:
+        restored_engine.dispose()
+    download = client.get(f"/backup/jobs/{incremental['job_id']}/download?full=true", headers=headers)
+    assert download.status_code == 200 and download.content == restored.read_bytes()
+
+    second = run()
+    client.post("/players/", json={"name": "Dave", "birthdate": "1993-01-01"}, headers=headers)
+    third = run()
+    # Two full backups are kept; the first one goes, and the incremental based on it.
+    listed = client.get("/backups/", headers=headers).json()["backups"]
+    assert [b["filename"] for b in listed] == [third["filename"], second["filename"]]
+    assert not (tmp_path / first["filename"]).exists()
+    assert not (tmp_path / incremental["filename"]).exists()
+    # Jobs still pointing at pruned files answer 410 instead of failing.
+    assert client.get(f"/backup/jobs/{first['job_id']}/download", headers=headers).status_code == 410
+    gone = client.get(f"/backup/jobs/{incremental['job_id']}/download?full=true", headers=headers)
+    assert gone.status_code == 410
+    assert listed[0]["size_bytes"] == (tmp_path / third["filename"]).stat().st_size
+
+def test_backup_job_joined_after_kind_change(tmp_path, monkeypatch):
+    """Test that an incremental backup that falls back to a full one is joined by a full backup request."""
+    import threading
+    from app import backup, crud
+
+    cleanup_database()
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path))
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers)
+
+    exporting, release = threading.Event(), threading.Event()
+    export = crud.export_database_to_sqlite
+
+    def gated_export(*args, **kwargs):
+        exporting.set()
+        release.wait(10)
+        return export(*args, **kwargs)
+
+    monkeypatch.setattr(crud, "export_database_to_sqlite", gated_export)
+    # No full backup to diff against yet: the incremental runs as a full one.
+    job_id = client.post("/backup/jobs?kind=incremental", headers=headers).json()["job_id"]
+    assert exporting.wait(10)
+    try:
+        assert client.post("/backup/jobs?kind=full", headers=headers).json()["job_id"] == job_id
+    finally:
+        release.set()
+    assert backup.get_job(job_id).wait(10)
+    assert backup.get_job(job_id).kind == "full"
+
+def test_migrate_db_resumes_and_verifies(tmp_path, monkeypatch):
+    """Test that migrate_db copies in batches, resumes after a failure and verifies the copy."""
+    import migrate_db
+    from sqlalchemy import create_engine, select
+
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    player = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    for day in range(1, 6):
+        client.post("/matches/", json={
+            "date": f"2024-09-{day:02d}", "team_young_score": 1, "team_old_score": 0,
+            "goals": [{"player_id": player["id"], "is_own_goal": False, "team": "young"}],
+        }, headers=headers)
+
+    target = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    write_batch = migrate_db.bulk_insert
+    batches = []
+
+    def failing_write_batch(conn, table, columns, rows):
+        batches.append(table.name)
+        if batches.count("goals") == 2:
+            raise RuntimeError("connection lost")
+        write_batch(conn, table, columns, rows)
+
+    monkeypatch.setattr(migrate_db, "bulk_insert", failing_write_batch)
+    with pytest.raises(RuntimeError):
+        migrate_db.migrate(engine, target, batch_size=2,
+                           checkpoint=migrate_db.Checkpoint(checkpoint_path, "src", "dst"))
+    assert os.path.exists(checkpoint_path)
+
+    monkeypatch.setattr(migrate_db, "bulk_insert", write_batch)
+    migrate_db.migrate(engine, target, batch_size=2,
+                       checkpoint=migrate_db.Checkpoint(checkpoint_path, "src", "dst"))
+    assert not os.path.exists(checkpoint_path)
+    try:
+        assert migrate_db.verify(engine, target, migrate_db.source_columns(engine)) == []
+        with target.connect() as conn:
+            assert tallies.verify(conn) == []
+            assert conn.execute(select(models.PlayerSeasonTally.goals)).scalar() == 5
+    finally:
+        target.dispose()
+
+def test_restore_backup(tmp_path, monkeypatch):
+    """Test that an uploaded backup replaces the data atomically and rejects invalid or oversized files."""
+    from app import crud, restore
+
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    client.post("/matches/", json={
+        "date": "2024-09-01", "team_young_score": 1, "team_old_score": 0,
+        "goals": [{"player_id": alice["id"], "is_own_goal": False, "team": "young"}],
+    }, headers=headers)
+    saved = tmp_path / "backup.db"
+    crud.export_database_to_sqlite(str(saved))
+
+    client.post("/players/", json={"name": "Bob", "birthdate": "1991-01-01"}, headers=headers)
+    client.delete(f"/matches/{client.get('/matches/', headers=headers).json()[0]['id']}", headers=headers)
+    before = client.get("/players/", headers=headers)
+
+    bad = client.post("/restore/", content=b"not a database", headers=headers)
+    assert bad.status_code == 400
+    assert client.get("/players/", headers={**headers, "If-None-Match": before.headers["etag"]}).status_code == 304
+    assert client.post("/restore/", content=saved.read_bytes(),
+                       headers=get_auth_headers(TEST_GLOBAL_PASSWORD)).status_code == 401
+    with monkeypatch.context() as m:
+        m.setattr(restore, "RESTORE_MAX_BYTES", 1024)
+        assert client.post("/restore/", content=saved.read_bytes(), headers=headers).status_code == 413
+        # Without a Content-Length the limit applies while streaming.
+        chunks = iter([saved.read_bytes()[:1000], saved.read_bytes()[1000:]])
+        assert client.post("/restore/", content=chunks, headers=headers).status_code == 413
+    assert client.get("/players/", headers={**headers, "If-None-Match": before.headers["etag"]}).status_code == 304
+
+    response = client.post("/restore/", content=saved.read_bytes(), headers=headers)
+    assert response.status_code == 200
+    assert response.json()["restored"] == {"players": 1, "matches": 1, "goals": 1, "player_visibility": 0}
+    assert [p["name"] for p in client.get("/players/", headers=headers).json()] == ["Alice"]
+    assert [(p["name"], p["goals"]) for p in client.get("/stats/", headers=headers).json()["leaderboard"]] == [("Alice", 1)]
+    db = SessionLocal()
+    try:
+        assert tallies.verify(db) == []
+    finally:
+        db.close()
+
+def test_init_db_skips_current_schema(monkeypatch):
+    """Test that startup skips the schema work once the stored schema version is current."""
+    from app import database
+
+    database.init_db()
+    assert database.stored_schema_version(engine) == database.SCHEMA_VERSION
+
+    calls = []
+    monkeypatch.setattr(database, "upgrade_schema", lambda bind: calls.append(bind))
+    database.init_db()
+    assert calls == []
+
+    database.store_schema_version(engine, database.SCHEMA_VERSION - 1)
+    database.init_db()
+    assert len(calls) == 1
+    assert database.stored_schema_version(engine) == database.SCHEMA_VERSION
+
+class FakeDriveSource:
+    """In-memory stand-in for download_db.DriveSource."""
+
+    def __init__(self, content, fail_after=None):
+        self.content = content
+        self.fail_after = fail_after
+        self.bytes_read = 0
+
+    def metadata(self, file_id):
+        import hashlib
+        return {"md5": hashlib.md5(self.content).hexdigest(), "modified": "2026-01-01T00:00:00Z",
+                "size": len(self.content)}
+
+    def read(self, file_id, start, length):
+        if self.fail_after is not None and self.bytes_read >= self.fail_after:
+            raise ConnectionError("connection reset")
+        self.bytes_read += length
+        return self.content[start:start + length]
+
+def test_download_db_skips_and_resumes(tmp_path):
+    """Test that download_db skips an identical file, resumes a partial one and swaps atomically."""
+    import download_db
+
+    dest = str(tmp_path / "football.db")
+    content = bytes(range(256)) * 40  # 10 KiB
+
+    def sync(source):
+        return download_db.sync(source, "file-id", dest, chunk_size=1024, progress=lambda message: None)
+
+    # An interrupted download leaves the old database alone and a .part behind.
+    interrupted = FakeDriveSource(content, fail_after=4096)
+    with pytest.raises(ConnectionError):
+        sync(interrupted)
+    assert not os.path.exists(dest)
+    assert os.path.getsize(dest + ".part") == 4096
+
+    resumed = FakeDriveSource(content)
+    assert sync(resumed) == "resumed"
+    assert resumed.bytes_read == len(content) - 4096
+    assert open(dest, "rb").read() == content
+    assert not os.path.exists(dest + ".part")
+
+    unchanged = FakeDriveSource(content)
+    assert sync(unchanged) == "unchanged"
+    assert unchanged.bytes_read == 0
+
+    # A locally modified file is replaced; a new remote version is fetched in full.
+    with open(dest, "r+b") as f:
+        f.write(b"local edit")
+    assert sync(FakeDriveSource(content)) == "downloaded"
+    assert open(dest, "rb").read() == content
+    changed = FakeDriveSource(content[::-1])
+    assert sync(changed) == "downloaded"
+    assert changed.bytes_read == len(content)
+    assert open(dest, "rb").read() == content[::-1]
+
+def test_bulk_match_import():
+    """Test that bulk match import validates every row and inserts all matches in one go."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "1991-01-01"}, headers=headers).json()
+
+    invalid = client.post("/matches/bulk", json=[
+        {"date": "2023-09-01", "team_young_score": 1, "team_old_score": 0,
+         "goals": [{"player_id": alice["id"], "team": "young"}]},
+        {"date": "not a date", "team_young_score": 1, "team_old_score": 0},
+        {"date": "2023-09-08", "team_young_score": 1, "team_old_score": 0,
+         "goals": [{"player_id": 99999, "team": "middle"}]},
+    ], headers=headers)
+    assert invalid.status_code == 422
+    assert [(e["row"], len(e["errors"])) for e in invalid.json()["errors"]] == [(2, 1), (3, 2)]
+    assert client.get("/matches/", headers=headers).json() == []
+
+    csv_body = (
+        "date,team_young_score,team_old_score,goals\n"
+        f"2023-09-01,2,1,\"{alice['id']}:young;{alice['id']}:young;{bob['id']}:old\"\n"
+        f"2024-03-01,0,1,{bob['id']}:young:own\n"
+        "2024-09-06,0,0,\n"
+    )
+    # One player check, the match inserts (one per row on SQLite, batched on
+    # Postgres), one goal insert, the tally upsert and its cleanup.
+    with assert_query_count(8):
+        created = client.post("/matches/bulk", content=csv_body,
+                              headers={**headers, "Content-Type": "text/csv"})
+    assert created.status_code == 201
+    assert created.json()["created"] == 3
+    matches = client.get("/matches/", headers=headers).json()
+    assert [m["date"] for m in matches] == ["2023-09-01", "2024-03-01", "2024-09-06"]
+    assert [len(m["goals"]) for m in matches] == [3, 1, 0]
+    leaderboard = client.get("/stats/2023", headers=headers).json()["leaderboard"]
+    assert [(p["name"], p["goals"]) for p in leaderboard] == [("Alice", 2), ("Bob", 1)]
+    db = SessionLocal()
+    try:
+        assert tallies.verify(db) == []
+    finally:
+        db.close()
+
+    bad_csv = client.post("/matches/bulk", content="date,goals\n", headers={**headers, "Content-Type": "text/csv"})
+    assert bad_csv.status_code == 400
+
+def test_update_match_diffs_goals():
+    """Test that editing a match only touches the goals that changed and keeps the other goal ids."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "1991-01-01"}, headers=headers).json()
+    goal = lambda player, team="young", own=False: {"player_id": player["id"], "team": team, "is_own_goal": own}
+    match = client.post("/matches/", json={
+        "date": "2024-09-01", "team_young_score": 3, "team_old_score": 0,
+        "goals": [goal(alice), goal(alice), goal(bob)],
+    }, headers=headers).json()
+    ids = sorted(g["id"] for g in match["goals"])
+
+    def put(goals, score=(3, 0)):
+        with assert_query_count(None) as statements:
+            response = client.put(f"/matches/{match['id']}", json={
+                "date": "2024-09-01", "team_young_score": score[0], "team_old_score": score[1], "goals": goals,
+            }, headers=headers)
+        assert response.status_code == 200
+        writes = [s.split()[0] for s in statements if "goals (" in s or s.startswith(("UPDATE goals", "DELETE FROM goals"))]
+        return response.json(), writes
+
+    # Same goals in another order: nothing to write, not even the tallies.
+    updated, writes = put([goal(bob), goal(alice), goal(alice)])
+    assert writes == []
+    assert sorted(g["id"] for g in updated["goals"]) == ids
+
+    # One of Alice's goals was really Bob's: a single UPDATE, ids unchanged.
+    updated, writes = put([goal(alice), goal(bob), goal(bob)])
+    assert writes == ["UPDATE"]
+    assert sorted(g["id"] for g in updated["goals"]) == ids
+
+    # Add an own goal and drop a Bob goal: the removed row is reused.
+    updated, writes = put([goal(alice), goal(bob), goal(alice, "old", own=True)], score=(2, 1))
+    assert writes == ["UPDATE"]
+    assert sorted(g["id"] for g in updated["goals"]) == ids
+
+    updated, writes = put([goal(alice)], score=(1, 0))
+    assert writes == ["DELETE"]
+    updated, writes = put([goal(alice), goal(bob)], score=(2, 0))
+    assert writes == ["INSERT"]
+
+    db = SessionLocal()
+    try:
+        assert tallies.verify(db) == []
+    finally:
+        db.close()
+
+def test_batch_player_deletion_and_reassignment():
+    """Test deleting several players and reassigning their goals in one request each."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    players = [
+        client.post("/players/", json={"name": name, "birthdate": "1990-01-01"}, headers=headers).json()
+        for name in ("Alice", "Bob", "Carol", "Dave")
+    ]
+    alice, bob, carol, dave = players
+    client.post("/matches/", json={
+        "date": "2024-09-01", "team_young_score": 3, "team_old_score": 0,
+        "goals": [{"player_id": p["id"], "team": "young"} for p in (alice, alice, bob)],
+    }, headers=headers)
+    assert client.put("/player-visibility/", json={
+        "player_id": alice["id"], "season_start_year": 2024, "hidden": True,
+    }, headers=headers).status_code == 200
+
+    deleted = client.post("/players/batch-delete", json={"player_ids": [alice["id"], bob["id"], 99999]}, headers=headers)
+    assert deleted.status_code == 200
+    assert deleted.json() == {"deleted_players": ["Alice", "Bob"], "reassigned_goals": 3, "skipped": [99999]}
+    unknown = client.get("/unknown-player/goals", headers=headers).json()
+    assert len(unknown) == 3
+    unknown_id = unknown[0]["player_id"]
+    assert {p["name"] for p in client.get("/players/", headers=headers).json()} == {"Carol", "Dave", "Unknown Player (Deleted)"}
+    assert client.get("/player-visibility/", headers=headers).json() == []
+
+    # The unknown player can't be deleted, in a batch or alone.
+    assert client.post("/players/batch-delete", json={"player_ids": [unknown_id]}, headers=headers).json()["skipped"] == [unknown_id]
+    assert client.delete(f"/players/{unknown_id}", headers=headers).status_code == 400
+
+    goal_ids = sorted(g["id"] for g in unknown)
+    missing_player = client.post("/unknown-player/reassign/batch", json={"assignments": [
+        {"goal_ids": goal_ids[:1], "new_player_id": 99999},
+    ]}, headers=headers)
+    assert missing_player.status_code == 404
+    # The player is checked even when there are no goals to move.
+    assert client.post("/unknown-player/reassign", json={
+        "goal_ids": [], "new_player_id": 99999,
+    }, headers=headers).status_code == 404
+
+    with assert_query_count(None) as statements:
+        reassigned = client.post("/unknown-player/reassign/batch", json={"assignments": [
+            {"goal_ids": goal_ids[:2], "new_player_id": carol["id"]},
+            {"goal_ids": goal_ids[2:], "new_player_id": dave["id"]},
+        ]}, headers=headers)
+    assert reassigned.json() == {"reassigned_goals": 3}
+    assert len([s for s in statements if s.startswith("UPDATE goals")]) == 1
+    assert client.get("/unknown-player/goals", headers=headers).json() == []
+    leaderboard = client.get("/stats/2024", headers=headers).json()["leaderboard"]
+    assert [(p["name"], p["goals"]) for p in leaderboard] == [("Carol", 2), ("Dave", 1)]
+
+    # Wiping the players drops the cached unknown player id with them.
+    cleanup_database()
+    # Deleting nobody doesn't create the unknown player.
+    assert client.post("/players/batch-delete", json={"player_ids": [99999]}, headers=headers).json()["skipped"] == [99999]
+    assert client.get("/players/", headers=headers).json() == []
+    eve = client.post("/players/", json={"name": "Eve", "birthdate": "1990-01-01"}, headers=headers).json()
+    client.post("/matches/", json={
+        "date": "2024-09-01", "team_young_score": 1, "team_old_score": 0,
+        "goals": [{"player_id": eve["id"], "team": "young"}],
+    }, headers=headers)
+    client.delete(f"/players/{eve['id']}", headers=headers)
+    unknown = client.get("/unknown-player/goals", headers=headers).json()
+    assert [p["id"] for p in client.get("/players/", headers=headers).json()] == [unknown[0]["player_id"]]
+    db = SessionLocal()
+    try:
+        assert tallies.verify(db) == []
+    finally:
+        db.close()
+
+def test_bulk_player_upsert():
+    """Test the roster upsert: added/updated/skipped counts, CSV input, row errors and the defaults on top of it."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    assert client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).status_code == 200
+    assert client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).status_code == 400
+
+    db = SessionLocal()
+    try:
+        db.add(models.SeasonSnapshot(season_start_year=2023, payload="{}", etag='"x"', created_at=datetime.now()))
+        db.commit()
+    finally:
+        db.close()
+
+    # SQLite: take the write lock, the names already there, the upsert, and
+    # dropping the snapshots (Alice's birthdate changed).
+    with assert_query_count(4):
+        roster = client.post("/players/bulk", json=[
+            {"name": "Alice", "birthdate": "1990-01-02"},
+            {"name": "Bob", "birthdate": "1991-01-01"},
+        ], headers=headers)
+    assert roster.json() == {"added": 1, "updated": 1, "skipped": 0, "total_requested": 2}
+    db = SessionLocal()
+    try:
+        assert db.query(models.SeasonSnapshot).count() == 0
+    finally:
+        db.close()
+
+    csv_roster = client.post("/players/bulk?update_existing=false", content=(
+        "name,birthdate\nAlice,1990-01-03\nBob,1991-01-01\nCarol,1992-01-01\n"
+    ), headers={**headers, "Content-Type": "text/csv"})
+    assert csv_roster.json() == {"added": 1, "updated": 0, "skipped": 2, "total_requested": 3}
+    unchanged = client.post("/players/bulk", json=[{"name": "Bob", "birthdate": "1991-01-01"}], headers=headers)
+    assert unchanged.json() == {"added": 0, "updated": 0, "skipped": 1, "total_requested": 1}
+    players = client.get("/players/", headers=headers).json()
+    assert [(p["name"], p["birthdate"]) for p in players] == [
+        ("Alice", "1990-01-02"), ("Bob", "1991-01-01"), ("Carol", "1992-01-01"),
+    ]
+
+    invalid = client.post("/players/bulk", json=[
+        {"name": "Dave", "birthdate": "1993-01-01"},
+        {"name": "Dave", "birthdate": "1993-01-02"},
+        {"name": "Eve"},
+    ], headers=headers)
+    assert invalid.status_code == 422
+    assert [e["row"] for e in invalid.json()["errors"]] == [2, 3]
+    assert len(client.get("/players/", headers=headers).json()) == 3
+
+    defaults = client.post("/players/defaults", headers=headers).json()
+    assert defaults["added"] == defaults["total_requested"] > 0
+    again = client.post("/players/defaults", headers=headers).json()
+    assert (again["added"], again["skipped"]) == (0, defaults["total_requested"])
+
+def test_resolved_visibility():
+    """Test the server-side effective visibility (inherited overrides) and the bulk override upsert."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice, bob, carol = (
+        client.post("/players/", json={"name": name, "birthdate": "1990-01-01"}, headers=headers).json()["id"]
+        for name in ("Alice", "Bob", "Carol")
+    )
+
+    assert client.put("/player-visibility/bulk", json=[
+        {"player_id": alice, "season_start_year": 2023, "hidden": True},
+        {"player_id": 99999, "season_start_year": 2023, "hidden": True},
+    ], headers=headers).status_code == 404
+    assert client.get("/player-visibility/", headers=headers).json() == []
+
+    upserted = client.put("/player-visibility/bulk", json=[
+        {"player_id": alice, "season_start_year": 2023, "hidden": True},
+        {"player_id": alice, "season_start_year": 2025, "hidden": False},
+        {"player_id": bob, "season_start_year": 2024, "hidden": False},
+        {"player_id": bob, "season_start_year": 2024, "hidden": True},
+    ], headers=headers)
+    assert upserted.json() == {"upserted": 3}
+
+    def resolved(season):
+        body = client.get(f"/player-visibility/resolved?season={season}", headers=headers).json()
+        return body["visible"], body["hidden"]
+
+    assert resolved(2022) == ([alice, bob, carol], [])
+    assert resolved(2023) == ([bob, carol], [alice])
+    with assert_query_count(1):
+        assert resolved(2024) == ([carol], [alice, bob])
+    with assert_query_count(0):  # cached until the next write
+        assert resolved(2024) == ([carol], [alice, bob])
+    assert resolved(2030) == ([alice, carol], [bob])
+
+    # Updating an existing override goes through the same upsert.
+    client.put("/player-visibility/bulk", json=[{"player_id": bob, "season_start_year": 2024, "hidden": False}], headers=headers)
+    assert resolved(2024) == ([bob, carol], [alice])
+    assert len(client.get("/player-visibility/", headers=headers).json()) == 3
+
+def test_bootstrap():
+    """Test that /bootstrap bundles the initial view's data under one ETag, matching the separate endpoints."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    bob = client.post("/players/", json={"name": "Bob", "birthdate": "1991-01-01"}, headers=headers).json()
+    for day, scorer in (("2023-09-01", alice), ("2024-09-01", bob), ("2024-09-08", alice)):
+        client.post("/matches/", json={
+            "date": day, "team_young_score": 1, "team_old_score": 0,
+            "goals": [{"player_id": scorer["id"], "team": "young"}],
+        }, headers=headers)
+    client.put("/player-visibility/", json={"player_id": alice["id"], "season_start_year": 2024, "hidden": True}, headers=headers)
+    client.delete(f"/players/{bob['id']}", headers=headers)
+
+    # BEGIN, players (+ goals, matches, goal players), matches (+ goals, goal
+    # players), visibility, unknown-player goals
+    with assert_query_count(9):
+        first = client.get("/bootstrap", headers=headers)
+    assert first.status_code == 200
+    body = first.json()
+    assert body["players"] == client.get("/players/", headers=headers).json()
+    assert body["matches"] == client.get("/matches/", headers=headers).json()
+    assert body["visibility"] == client.get("/player-visibility/", headers=headers).json()
+    unknown = client.get("/unknown-player/goals", headers=headers).json()
+    assert [(g["id"], g["match"]["date"]) for g in body["unknown_player_goals"]] == [(g["id"], g["match"]["date"]) for g in unknown]
+
+    with assert_query_count(0):
+        assert client.get("/bootstrap", headers={**headers, "If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    season = client.get("/bootstrap?season=2024", headers=headers).json()
+    assert [m["date"] for m in season["matches"]] == ["2024-09-01", "2024-09-08"]
+    assert season["players"] == client.get("/players/?season=2024", headers=headers).json()
+
+def test_bootstrap_reads_one_sqlite_transaction(monkeypatch):
+    """Test that the /bootstrap queries share one SQLite read transaction instead of reading separately."""
+    from app import async_crud
+
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    get_matches = async_crud.get_matches
+    in_transaction = []
+
+    async def get_matches_after_players(db, **kwargs):
+        connection = await db.connection()
+        in_transaction.append((await connection.get_raw_connection()).driver_connection.in_transaction)
+        return await get_matches(db, **kwargs)
+
+    monkeypatch.setattr(async_crud, "get_matches", get_matches_after_players)
+    assert client.get("/bootstrap", headers=headers).status_code == 200
+    assert in_transaction == [True]
+
+def test_event_hub_fan_out():
+    """Test the live-update hub: cross-thread publishing, Last-Event-ID replay and resync for slow subscribers."""
+    import asyncio
+    import threading
+
+    hub = events.Hub()
+
+    async def scenario():
+        first = hub.subscribe()
+        second = hub.subscribe()
+        # Published from a worker thread, as the sync endpoints do.
+        worker = threading.Thread(target=hub.publish, args=("match.deleted", {"id": 1}))
+        worker.start()
+        worker.join()
+        got = [await asyncio.wait_for(s.get(), 1) for s in (first, second)]
+        assert [(e.type, e.data) for e in got] == [("match.deleted", {"id": 1})] * 2
+        assert got[0].sse() == b"id: %d\nevent: match.deleted\ndata: {\"id\":1}\n\n" % got[0].id
+
+        # A reconnecting client gets what it missed, in order.
+        later = hub.publish("matches.cleared")
+        replay = hub.subscribe(str(got[0].id))
+        assert (await replay.get()).id == later.id
+        # Unknown ids (another server process, or too old) mean: resync.
+        assert (await hub.subscribe("1").get()).type == "resync"
+
+        # A subscriber that stops reading is told to resync, not waited for.
+        # Events after the overflow follow the resync (the queue already held
+        # matches.cleared, so event 99 was the one that didn't fit).
+        for i in range(events.MAX_QUEUED + 5):
+            hub.publish("match.deleted", {"id": i})
+        assert (await second.get()).type == "resync"
+        assert [(await second.get()).data["id"] for _ in range(second.queue.qsize())] == list(range(100, 105))
+
+        for s in (first, second, replay):
+            hub.unsubscribe(s)
+        assert hub.subscriber_count == 1
+
+    asyncio.run(scenario())
+
+def test_live_events_websocket():
+    """Test that the mutating endpoints publish compact change events to /events/ws subscribers."""
+    cleanup_database()
+    headers = get_auth_headers(TEST_GLOBAL_PASSWORD, TEST_ADMIN_PASSWORD)
+    alice = client.post("/players/", json={"name": "Alice", "birthdate": "1990-01-01"}, headers=headers).json()
+    assert client.get("/events").status_code == 401
+
+    with client.websocket_connect("/events/ws") as ws:
+        ws.send_json({"password": "wrong"})
+        with pytest.raises(Exception):
+            ws.receive_json()
+
+    with client.websocket_connect("/events/ws") as ws:
+        ws.send_json({"password": TEST_GLOBAL_PASSWORD})
+        match = client.post("/matches/", json={
+            "date": "2024-09-01", "team_young_score": 1, "team_old_score": 0,
+            "goals": [{"player_id": alice["id"], "team": "young"}],
+        }, headers=headers).json()
+        created = ws.receive_json()
+        assert created["type"] == "match.created"
+        assert created["data"]["matches"]["id"] == [match["id"]]
+        assert created["data"]["goals"]["player_id"] == [alice["id"]]
+        assert created["data"]["players"]["name"] == ["Alice"]
+
+        # A goal added during the game: the match's goal table is replaced.
+        client.put(f"/matches/{match['id']}", json={
+            "date": "2024-09-01", "team_young_score": 2, "team_old_score": 0,
+            "goals": [{"player_id": alice["id"], "team": "young"}] * 2,
+        }, headers=headers)
+        updated = ws.receive_json()
+        assert updated["type"] == "match.updated"
+        assert updated["data"]["matches"]["team_young_score"] == [2]
+        assert len(updated["data"]["goals"]["id"]) == 2
+        assert updated["id"] > created["id"]
+
+        client.put("/player-visibility/", json={"player_id": alice["id"], "season_start_year": 2024, "hidden": True}, headers=headers)
+        client.delete(f"/player-visibility/{alice['id']}/2024", headers=headers)
+        assert [ws.receive_json()["data"]["overrides"][0]["hidden"] for _ in range(2)] == [True, None]
+
+        client.delete(f"/matches/{match['id']}", headers=headers)
+        assert ws.receive_json() == {"id": created["id"] + 4, "type": "match.deleted", "data": {"id": match["id"]}}
+
+    # The disconnected subscriber is gone from the hub.
+    assert events.hub.subscriber_count == 0
+
+def test_event_stream_subscribes_when_streaming():
+    """Test that an /events response dropped before it streams leaves no subscriber behind."""
+    import asyncio
+    from app.main import stream_events
+
+    async def check():
+        response = await stream_events(last_event_id=None, global_auth=True)
+        assert events.hub.subscriber_count == 0
+        body = response.body_iterator
+        assert await body.__anext__() == b"retry: 3000\n\n"
+        assert events.hub.subscriber_count == 1
+        await body.aclose()
+        assert events.hub.subscriber_count == 0
+
+    asyncio.run(check())
@@ -41,6 +41,16 @@ export const authenticateAdmin = async (password) => {
 };
 
 // Player functions
+// Initial view in one request and one consistent snapshot:
+// { players, matches, visibility, unknown_player_goals }.
+export const getBootstrap = async (globalPassword, seasonStartYear = null) => {
+  const query = seasonStartYear == null ? '' : `?season=${seasonStartYear}`;
+  const response = await fetch(`${API_URL}/bootstrap${query}`, {
+    headers: getAuthHeaders(globalPassword),
+  });
+  return response;
+};
+
 export const getPlayers = async (globalPassword) => {
   const response = await fetch(`${API_URL}/players/`, {
     headers: getAuthHeaders(globalPassword),
@@ -118,6 +128,25 @@ export const getPlayerVisibility = async (globalPassword) => {
   return response;
 };
 
+// Effective visible / hidden player ids for one season (inheritance resolved
+// server-side): { season_start_year, visible: [ids], hidden: [ids] }.
+export const getResolvedVisibility = async (seasonStartYear, globalPassword) => {
+  const response = await fetch(`${API_URL}/player-visibility/resolved?season=${seasonStartYear}`, {
+    headers: getAuthHeaders(globalPassword),
+  });
+  return response;
+};
+
+// Upsert many overrides ([{ player_id, season_start_year, hidden }]) at once.
+export const setPlayerVisibilityBulk = async (overrides, adminPassword) => {
+  const response = await fetch(`${API_URL}/player-visibility/bulk`, {
+    method: 'PUT',
+    headers: getAuthHeaders(null, adminPassword),
+    body: JSON.stringify(overrides),
+  });
+  return response;
+};
+
 export const setPlayerVisibility = async (playerId, seasonStartYear, hidden, adminPassword) => {
   const response = await fetch(`${API_URL}/player-visibility/`, {
     method: 'PUT',
@@ -181,18 +210,124 @@ export const deleteAllMatches = async (adminPassword) => {
   return response;
 };
 
+// Season stats functions
+export const getSeasons = async (globalPassword) => {
+  const response = await fetch(`${API_URL}/seasons/`, {
+    headers: getAuthHeaders(globalPassword),
+  });
+  return response;
+};
+
+// `season` is a season start year, or ALL_SEASONS / null for all time.
+// Pass fresh = true when the data is known to have changed (a live event):
+// the request then always revalidates with the server instead of possibly
+// being answered from the browser cache.
+export const getSeasonStats = async (season, globalPassword, fresh = false) => {
+  const path = typeof season === 'number' ? `/stats/${season}` : '/stats/';
+  const response = await fetch(`${API_URL}${path}`, {
+    headers: getAuthHeaders(globalPassword),
+    cache: fresh ? 'no-cache' : 'default',
+  });
+  return response;
+};
+
 // Backup functions
-export const createBackup = async (adminPassword) => {
-  const response = await fetch(`${API_URL}/backup/`, {
+// Backups run as background jobs: start one, poll it until its status is
+// "done" (or "failed"), then download its file. Starting a backup while one
+// is running returns that job.
+export const startBackupJob = async (adminPassword) => {
+  const response = await fetch(`${API_URL}/backup/jobs`, {
     method: 'POST',
     headers: getAuthHeaders(null, adminPassword),
   });
   return response;
 };
 
+// { job_id, status, filename, tables_total, tables_done, current_table, rows_copied, error, ... }
+export const getBackupJob = async (jobId, adminPassword) => {
+  const response = await fetch(`${API_URL}/backup/jobs/${jobId}`, {
+    headers: getAuthHeaders(null, adminPassword),
+  });
+  return response;
+};
+
+export const downloadBackupJob = async (jobId, adminPassword) => {
+  const response = await fetch(`${API_URL}/backup/jobs/${jobId}/download`, {
+    headers: getAuthHeaders(null, adminPassword),
+  });
+  return response;
+};
+
 export const listBackups = async (globalPassword) => {
   const response = await fetch(`${API_URL}/backups/`, {
     headers: getAuthHeaders(globalPassword),
   });
   return response;
-};
\ No newline at end of file
+};
+
+// Live updates: follows the /events Server-Sent Events stream and calls
+// onEvent(type, data) for each change (see backend/app/events.py for the event
+// types). EventSource can't send the password header, so the stream is read
+// with fetch. Reconnects with Last-Event-ID after errors; call the returned
+// function to stop.
+export const subscribeToEvents = (globalPassword, onEvent) => {
+  const controller = new AbortController();
+  let lastEventId = null;
+
+  const connect = async () => {
+    const headers = { 'X-Global-Password': globalPassword };
+    if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+    const response = await fetch(`${API_URL}/events`, { headers, signal: controller.signal });
+    if (!response.ok) throw new Error(`Event stream failed: ${response.status}`);
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += value;
+      let end;
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const fields = {};
+        buffer.slice(0, end).split('\n').forEach((line) => {
+          const colon = line.indexOf(':');
+          if (colon > 0) fields[line.slice(0, colon)] = line.slice(colon + 1).trimStart();
+        });
+        buffer = buffer.slice(end + 2);
+        if (fields.id) lastEventId = fields.id;
+        if (fields.event) onEvent(fields.event, JSON.parse(fields.data || '{}'));
+      }
+    }
+  };
+
+  (async () => {
+    while (!controller.signal.aborted) {
+      try {
+        await connect();
+      } catch (error) {
+        if (controller.signal.aborted) return;
+      }
+      await new Promise((resolve) => setTimeout(resolve, 3000));
+    }
+  })();
+
+  return () => controller.abort();
+};
+
+// Expands the compact tables of a match.created / match.updated event into
+// match objects shaped like GET /matches/ (goals with their player).
+export const matchesFromEvent = ({ players, matches, goals }) => {
+  const rows = (table) => (table.id || []).map((_, i) =>
+    Object.fromEntries(Object.keys(table).map((key) => [key, table[key][i]])));
+  const playersById = new Map(rows(players).map((p) => [p.id, p]));
+  const shallowMatches = rows(matches);
+  const byMatch = new Map(shallowMatches.map((m) => [m.id, { ...m, goals: [] }]));
+  const shallowById = new Map(shallowMatches.map((m) => [m.id, m]));
+  rows(goals).forEach(({ match_id: matchId, ...goal }) => {
+    byMatch.get(matchId).goals.push({
+      ...goal,
+      match: shallowById.get(matchId),
+      player: playersById.get(goal.player_id) || null,
+    });
+  });
+  return Array.from(byMatch.values());
+};
@@ -8,14 +8,18 @@ import {
   Box,
   Alert,
   CircularProgress,
+  LinearProgress,
   Paper
 } from '@mui/material';
-import { createBackup, listBackups } from '../api';
+import { startBackupJob, getBackupJob, downloadBackupJob, listBackups } from '../api';
+
+const POLL_INTERVAL_MS = 1000;
 
 const BackupManager = ({ globalPassword, adminPassword, isAdminAuthenticated }) => {
   const [backups, setBackups] = useState([]);
   const [loading, setLoading] = useState(true);
   const [creatingBackup, setCreatingBackup] = useState(false);
+  const [job, setJob] = useState(null);
   const [error, setError] = useState('');
 
   const fetchBackups = async () => {
@@ -43,14 +47,34 @@ const BackupManager = ({ globalPassword, adminPassword, isAdminAuthenticated })
     setError('');
     
     try {
-      const response = await createBackup(adminPassword);
-      
+      // The export can take a while on a cold database, so it runs as a job
+      // whose progress is polled; the file is downloaded once it is done.
+      const started = await startBackupJob(adminPassword);
+      if (!started.ok) {
+        const errorData = await started.json();
+        setError(errorData.detail || 'Failed to create backup');
+        return;
+      }
+      let current = await started.json();
+      setJob(current);
+      while (current.status === 'pending' || current.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        const polled = await getBackupJob(current.job_id, adminPassword);
+        if (!polled.ok) throw new Error(`status ${polled.status}`);
+        current = await polled.json();
+        setJob(current);
+      }
+      if (current.status === 'failed') {
+        setError('Failed to create backup: ' + current.error);
+        return;
+      }
+
+      const response = await downloadBackupJob(current.job_id, adminPassword);
       if (response.ok) {
-        // Get the filename from the response headers, falling back to a
-        // timestamped name if the header isn't readable (e.g. not exposed).
+        // Get the filename from the response headers, falling back to the
+        // job's if the header isn't readable (e.g. not exposed).
         const contentDisposition = response.headers.get('content-disposition');
-        const ts = new Date().toISOString().slice(0, 19).replace(/[-:T]/g, '');
-        let filename = `football_backup_${ts}.db`;
+        let filename = current.filename;
         if (contentDisposition) {
           const filenameMatch = contentDisposition.match(/filename="(.+)"/);
           if (filenameMatch) {
@@ -79,6 +103,7 @@ const BackupManager = ({ globalPassword, adminPassword, isAdminAuthenticated })
       setError('Failed to create backup: ' + error.message);
     } finally {
       setCreatingBackup(false);
+      setJob(null);
     }
   };
 
@@ -117,6 +142,20 @@ const BackupManager = ({ globalPassword, adminPassword, isAdminAuthenticated })
         {creatingBackup ? 'Creating Backup...' : 'Create New Backup'}
       </Button>
 
+      {job && (
+        <Box sx={{ mb: 3 }}>
+          <LinearProgress
+            variant={job.status === 'pending' ? 'indeterminate' : 'determinate'}
+            value={(100 * job.tables_done) / job.tables_total}
+          />
+          <Typography variant="body2" color="text.secondary" sx={{ mt: 1 }}>
+            {job.status === 'pending'
+              ? 'Waiting to start...'
+              : `Copied ${job.rows_copied} rows (${job.tables_done}/${job.tables_total} tables${job.current_table ? `, now ${job.current_table}` : ''})`}
+          </Typography>
+        </Box>
+      )}
+
       {error && (
         <Alert severity="error" sx={{ mb: 2 }}>
           {error}
@@ -13,7 +13,7 @@ import {
   Alert,
   CircularProgress
 } from '@mui/material';
-import { getMatches, deleteAllMatches } from '../api';
+import { getMatches, deleteAllMatches, subscribeToEvents, matchesFromEvent } from '../api';
 import MatchModal from './MatchModal';
 import SeasonSelector from './SeasonSelector';
 import { seasonsFromDates, isDateInSeason, resolveSeasonAccess } from '../utils/season';
@@ -67,6 +67,25 @@ const MatchList = ({ globalPassword, adminPassword, isAdminAuthenticated, select
     fetchMatches();
   }, [globalPassword]);
 
+  // Live updates: patch the list from the change events instead of
+  // refetching it; anything not described by one event refetches.
+  useEffect(() => {
+    const byNewest = (a, b) => new Date(b.date) - new Date(a.date);
+    return subscribeToEvents(globalPassword, (type, data) => {
+      if (type === 'match.created' || type === 'match.updated') {
+        const changed = matchesFromEvent(data);
+        const ids = new Set(changed.map((m) => m.id));
+        setMatches((current) => [...current.filter((m) => !ids.has(m.id)), ...changed].sort(byNewest));
+      } else if (type === 'match.deleted') {
+        setMatches((current) => current.filter((m) => m.id !== data.id));
+      } else if (type === 'matches.cleared') {
+        setMatches([]);
+      } else if (type === 'matches.imported' || type === 'players.changed' || type === 'resync') {
+        fetchMatches();
+      }
+    });
+  }, [globalPassword]);
+
   // Seasons available in the data, gated by viewer role (non-admins only see
   // finished seasons), then the matches for the effective season.
   const availableSeasons = seasonsFromDates(matches.map((m) => m.date));
@@ -8,9 +8,8 @@ import {
   CircularProgress,
 } from '@mui/material';
 import SlideshowIcon from '@mui/icons-material/Slideshow';
-import { getPlayers, getMatches } from '../api';
-import { getSeasonLabel, resolveSeasonAccess, seasonsFromDates } from '../utils/season';
-import { computeSeasonStats } from '../utils/stats';
+import { getSeasons, getSeasonStats, subscribeToEvents, matchesFromEvent } from '../api';
+import { getSeasonLabel, isDateInSeason, resolveSeasonAccess } from '../utils/season';
 import SeasonSelector from './SeasonSelector';
 import Podium from './stats/Podium';
 import LeaderboardChart from './stats/LeaderboardChart';
@@ -36,29 +35,26 @@ const Section = ({ title, children, action }) => (
 );
 
 const StatsPage = ({ globalPassword, isAdminAuthenticated, selectedSeason, onSeasonChange }) => {
-  const [players, setPlayers] = useState([]);
-  const [matches, setMatches] = useState([]);
+  const [availableSeasons, setAvailableSeasons] = useState([]);
+  const [seasonsLoaded, setSeasonsLoaded] = useState(false);
+  const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [presenting, setPresenting] = useState(false);
 
+  // Seasons present in the data (newest first); needed to resolve access.
   useEffect(() => {
     let active = true;
     (async () => {
-      setLoading(true);
       try {
-        const [pRes, mRes] = await Promise.all([getPlayers(globalPassword), getMatches(globalPassword)]);
+        const res = await getSeasons(globalPassword);
         if (!active) return;
-        if (pRes.ok && mRes.ok) {
-          setPlayers(await pRes.json());
-          setMatches(await mRes.json());
-        } else {
-          setError('Failed to load stats data');
-        }
+        if (res.ok) setAvailableSeasons(await res.json());
+        else setError('Failed to load stats data');
       } catch (e) {
         if (active) setError('Failed to load stats data');
       } finally {
-        if (active) setLoading(false);
+        if (active) setSeasonsLoaded(true);
       }
     })();
     return () => {
@@ -66,16 +62,76 @@ const StatsPage = ({ globalPassword, isAdminAuthenticated, selectedSeason, onSea
     };
   }, [globalPassword]);
 
-  const availableSeasons = seasonsFromDates(matches.map((m) => m.date));
   const { options: seasonOptions, allowAllTime, effectiveSeason, noAccess } = resolveSeasonAccess({
     isAdmin: isAdminAuthenticated,
     selectedSeason,
     seasonsPresent: availableSeasons,
   });
-  const stats = computeSeasonStats(players, matches, effectiveSeason);
   const seasonLabel = getSeasonLabel(effectiveSeason);
 
-  if (loading) {
+  // The season's stats are aggregated server-side (see backend app/stats.py).
+  useEffect(() => {
+    if (!seasonsLoaded) return undefined;
+    if (noAccess) {
+      setLoading(false);
+      return undefined;
+    }
+    let active = true;
+    (async () => {
+      setLoading(true);
+      try {
+        const res = await getSeasonStats(effectiveSeason, globalPassword);
+        if (!active) return;
+        if (res.ok) setStats(await res.json());
+        else setError('Failed to load stats data');
+      } catch (e) {
+        if (active) setError('Failed to load stats data');
+      } finally {
+        if (active) setLoading(false);
+      }
+    })();
+    return () => {
+      active = false;
+    };
+  }, [globalPassword, effectiveSeason, noAccess, seasonsLoaded]);
+
+  // Live updates: refetch the season list and the shown season's stats in
+  // the background (no spinner) when the data behind them changes, so an
+  // open presentation keeps its slide and picks up e.g. a late goal.
+  useEffect(() => {
+    if (!seasonsLoaded || noAccess) return undefined;
+    let active = true;
+    const refresh = async (withStats) => {
+      try {
+        const [seasonsRes, statsRes] = await Promise.all([
+          getSeasons(globalPassword),
+          withStats ? getSeasonStats(effectiveSeason, globalPassword, true) : null,
+        ]);
+        if (active && seasonsRes.ok) setAvailableSeasons(await seasonsRes.json());
+        if (active && statsRes && statsRes.ok) setStats(await statsRes.json());
+      } catch (e) {
+        // Keep showing the current stats; the next event refetches.
+      }
+    };
+    const unsubscribe = subscribeToEvents(globalPassword, (type, data) => {
+      if (type === 'match.created') {
+        // A match in another season can only add that season to the list.
+        refresh(matchesFromEvent(data).some((m) => isDateInSeason(m.date, effectiveSeason)));
+      } else {
+        refresh(true);
+      }
+    });
+    return () => {
+      active = false;
+      unsubscribe();
+    };
+  }, [globalPassword, effectiveSeason, noAccess, seasonsLoaded]);
+
+  if (error) {
+    return <Alert severity="error">{error}</Alert>;
+  }
+
+  if (loading || (!noAccess && !stats)) {
     return (
       <Box display="flex" justifyContent="center" p={4}>
         <CircularProgress />
@@ -83,11 +139,7 @@ const StatsPage = ({ globalPassword, isAdminAuthenticated, selectedSeason, onSea
     );
   }
 
-  if (error) {
-    return <Alert severity="error">{error}</Alert>;
-  }
-
-  const hasData = stats.matchCount > 0;
+  const hasData = !noAccess && stats.matchCount > 0;
 
   return (
     <Box>